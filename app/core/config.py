@@ -21,6 +21,10 @@ class Settings(BaseSettings):
     OLLAMA_HOST: str = os.getenv("OLLAMA_HOST", "http://localhost:11434")
     LLM_MODEL: str = os.getenv("LLM_MODEL", "llama3.2:3b")
     SMALLER_LLM_MODEL: str = os.getenv("SMALLER_LLM_MODEL", "llama3.2:3b")
+    LLM_KEEP_ALIVE: str = os.getenv("LLM_KEEP_ALIVE", "30m")
+    LLM_MAX_CONCURRENT_REQUESTS: int = int(os.getenv("LLM_MAX_CONCURRENT_REQUESTS", 8))
+    LLM_MAX_CONCURRENT_STREAMS: int = int(os.getenv("LLM_MAX_CONCURRENT_STREAMS", 16))
+    LLM_HTTP_POOL_SIZE: int = int(os.getenv("LLM_HTTP_POOL_SIZE", 10))
     
     TAVILY_API_KEY: str = os.getenv("TAVILY_API_KEY", "")
     ALPHA_VANTAGE_API_KEY: str = os.getenv("ALPHA_VANTAGE_API_KEY", "")
@@ -38,6 +42,18 @@ class Settings(BaseSettings):
 
     NEWS_API_KEY: str = os.getenv("NEWS_API_KEY", "your-newsapi-key")
 
+    YF_HISTORY_CACHE_DIR: str = os.getenv("YF_HISTORY_CACHE_DIR", ".cache/yf_history")
+    YF_HISTORY_CACHE_TTL_SECONDS: int = int(os.getenv("YF_HISTORY_CACHE_TTL_SECONDS", 86400))
+    PROPHET_MODEL_CACHE_DIR: str = os.getenv("PROPHET_MODEL_CACHE_DIR", ".cache/prophet")
+    PROPHET_FIT_WORKERS: int = int(os.getenv("PROPHET_FIT_WORKERS", min(4, os.cpu_count() or 1)))
+    PROPHET_WARM_FIT_POOL: bool = os.getenv("PROPHET_WARM_FIT_POOL", "false").lower() == "true"
+    PROPHET_LOOKBACK_DAYS: int = int(os.getenv("PROPHET_LOOKBACK_DAYS", 1095))
+    PROPHET_DAILY_SEASONALITY: bool = os.getenv("PROPHET_DAILY_SEASONALITY", "false").lower() == "true"
+    PROPHET_WEEKLY_SEASONALITY: bool = os.getenv("PROPHET_WEEKLY_SEASONALITY", "true").lower() == "true"
+    PROPHET_YEARLY_SEASONALITY: bool = os.getenv("PROPHET_YEARLY_SEASONALITY", "false").lower() == "true"
+
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+
     FRONTEND_BASE_URL: str = os.getenv("FRONTEND_BASE_URL", "http://localhost:3000")
 
     class Config:
@@ -0,0 +1,46 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from app.core.config import settings
+
+_LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+def configure_logging() -> QueueListener:
+    """Routes application logging through a queue drained by a background thread.
+
+    Log calls made from request handlers only enqueue the record; formatting
+    and the blocking write to stderr happen on the listener's thread, so
+    logging never stalls the event loop.
+
+    Returns:
+        QueueListener: The started listener. Call `stop()` on shutdown to
+                       flush pending records.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.setLevel(settings.LOG_LEVEL)
+    root.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+def configure_worker_logging() -> None:
+    """Points a forked worker process's root logger straight at stderr.
+
+    A forked child inherits the parent's QueueHandler, but not the listener
+    thread that drains the queue, so records logged there would be lost.
+    """
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.setLevel(settings.LOG_LEVEL)
+    root.addHandler(stream_handler)
@@ -1,6 +1,7 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.models.transaction import Transaction as TxModel
+from typing import Iterator, List, Optional, Tuple
+from app.models.transaction import Transaction as TxModel, TransactionType
 from app.schemas.transaction import TransactionCreate, TransactionUpdate
 
 def create_transaction(
@@ -45,6 +46,53 @@ def get_transactions(
         q = q.filter(TxModel.timestamp <= end)
     return q.order_by(TxModel.timestamp.desc()).offset(skip).limit(limit).all()
 
+def iter_transactions_chronological(
+    db: Session, portfolio_id: int, batch_size: int = 1000
+) -> Iterator[Tuple[str, TransactionType, float, float]]:
+    """Streams the trade fields of a portfolio's transactions, oldest first.
+
+    Ordering is done by the database and rows are fetched in batches, so the
+    full history is never held in memory at once. Only the columns needed
+    to replay trades are selected, which skips ORM object hydration.
+
+    Args:
+        db (Session): The SQLAlchemy database session.
+        portfolio_id (int): The ID of the portfolio.
+        batch_size (int): Number of rows fetched per round trip.
+
+    Returns:
+        Iterator[Tuple[str, TransactionType, float, float]]: One
+            `(symbol, type, quantity, price)` row per transaction in
+            chronological order.
+    """
+    return (
+        db.query(TxModel.symbol, TxModel.type, TxModel.quantity, TxModel.price)
+        .filter(TxModel.portfolio_id == portfolio_id)
+        .order_by(TxModel.timestamp.asc(), TxModel.id.asc())
+        .yield_per(batch_size)
+    )
+
+def get_transaction_watermark(db: Session, portfolio_id: int) -> Tuple[int, Optional[int]]:
+    """Returns the transaction count and highest transaction ID of a portfolio.
+
+    Any insert or delete changes this pair, which makes it a cheap key for
+    results derived from the full transaction history.
+
+    Args:
+        db (Session): The SQLAlchemy database session.
+        portfolio_id (int): The ID of the portfolio.
+
+    Returns:
+        Tuple[int, Optional[int]]: The number of transactions and the highest
+                                   transaction ID (None if there are none).
+    """
+    count, max_id = (
+        db.query(func.count(TxModel.id), func.max(TxModel.id))
+        .filter(TxModel.portfolio_id == portfolio_id)
+        .one()
+    )
+    return count, max_id
+
 def update_transaction(
     db: Session, tx_id: int, tx_in: TransactionUpdate
 ) -> Optional[TxModel]:
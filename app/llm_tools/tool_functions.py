@@ -2,8 +2,8 @@ import json
 from typing import Optional, Dict, Any, List
 
 from app.services.financial_data_service import financial_data_service
-from app.services.web_search_service import web_search_service
-from app.services.vector_db_service import vector_db_service
+from app.services.web_search_service import NO_SEARCH_RESULTS, web_search_service
+from app.services.vector_db_service import KB_NO_CONTEXT_MESSAGES, vector_db_service
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.crud import portfolio as crud_portfolio, user as crud_user
@@ -31,10 +31,35 @@ async def get_stock_price(symbol: str):
 
     search_query = f"current price of {symbol.upper()} stock in USD"
     web_search_result = await web_search_service.get_search_context(search_query, max_results=1)
-    if web_search_result and "No relevant information" not in web_search_result:
+    if web_search_result and web_search_result != NO_SEARCH_RESULTS:
         return f"{error_message} Web search for '{search_query}' found: {web_search_result}"
     return f"{error_message} Web search fallback also did not find price information for {symbol.upper()}."
 
+async def get_stock_prices(symbols: str):
+    """Fetches the current trading prices for several stocks in one batch.
+
+    Args:
+        symbols (str): Comma-separated stock ticker symbols (e.g., "AAPL,MSFT").
+
+    Returns:
+        str: One line per symbol with its price, or the reason no valid
+             price could be retrieved for it.
+    """
+    symbol_list = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    if not symbol_list:
+        return "No stock symbols were provided."
+
+    quotes = await financial_data_service.get_stock_quotes_batch(symbol_list)
+    lines = []
+    for symbol in symbol_list:
+        data = quotes.get(symbol)
+        if data and "Error Message" not in data and data.get('05. price') and data.get('05. price') != 'N/A':
+            lines.append(f"The current price of {symbol} is ${data.get('05. price')}. Latest trading day: {data.get('07. latest trading day', 'N/A')}.")
+        else:
+            api_msg = data.get('Error Message', 'No specific API error message or invalid price.') if data else 'No data returned.'
+            lines.append(f"Could not retrieve a valid current stock price for {symbol}. API Message: {api_msg}")
+    return "\n".join(lines)
+
 async def get_crypto_price(symbol: str, market: str = None):
     """Fetches the current price for a cryptocurrency, with web search fallback.
 
@@ -75,7 +100,7 @@ async def get_crypto_price(symbol: str, market: str = None):
 
     search_query = f"current price of {symbol.upper()} cryptocurrency in {effective_market.upper()}"
     web_search_result = await web_search_service.get_search_context(search_query, max_results=1)
-    if web_search_result and "No relevant information" not in web_search_result:
+    if web_search_result and web_search_result != NO_SEARCH_RESULTS:
         return f"{error_message} Web search for '{search_query}' found: {web_search_result}"
     return f"{error_message} Web search fallback also did not find price information for {symbol.upper()}/{effective_market.upper()}."
 
@@ -125,7 +150,7 @@ async def get_financial_news(query: str, limit: int = 3):
             "coindesk.com", "cointelegraph.com", "theblockcrypto.com" 
             ]
     )
-    if news_context and "No relevant information" not in news_context:
+    if news_context and news_context != NO_SEARCH_RESULTS:
         return f"News found for '{query}' (limit {validated_limit}):\n{news_context}"
     return f"No specific news found via web search for the query: '{query}' from preferred financial news domains."
 
@@ -147,13 +172,14 @@ async def explain_financial_concept(concept_name: str):
             print(f"Error querying vector DB for '{concept_name}': {e}")
             pinecone_context = "" 
 
-    if pinecone_context and "No relevant documents found" not in pinecone_context and len(pinecone_context.strip()) > 10:
+    has_kb_context = bool(pinecone_context) and pinecone_context not in KB_NO_CONTEXT_MESSAGES and len(pinecone_context.strip()) > 10
+    if has_kb_context:
         return f"From Knowledge Base for '{concept_name}':\n{pinecone_context}"
     
     web_search_context = await web_search_service.get_search_context(f"what is {concept_name} in finance", max_results=1)
-    if web_search_context and "No relevant information" not in web_search_context:
+    if web_search_context and web_search_context != NO_SEARCH_RESULTS:
         source_prefix = "Web explanation"
-        if not (pinecone_context and "No relevant documents found" not in pinecone_context and len(pinecone_context.strip()) > 10):
+        if not has_kb_context:
             source_prefix = "Could not find specific information in Knowledge Base. Web explanation"
         return f"{source_prefix} for '{concept_name}':\n{web_search_context}"
     
@@ -169,7 +195,7 @@ async def general_web_search(query: str):
         str: A formatted string of the search results or a not-found message.
     """
     search_results = await web_search_service.get_search_context(query, max_results=3) 
-    if search_results and "No relevant information" not in search_results:
+    if search_results and search_results != NO_SEARCH_RESULTS:
         return f"Web search results for '{query}':\n{search_results}"
     return f"No specific information found via web search for '{query}'."
 
@@ -510,6 +536,7 @@ async def get_portfolio_pnl_tool(user_id: int, portfolio_name: Optional[str] = N
 
 TOOL_FUNCTIONS = {
     "get_stock_price": get_stock_price,
+    "get_stock_prices": get_stock_prices,
     "get_crypto_price": get_crypto_price,
     "get_company_overview": get_company_overview,
     "get_financial_news": get_financial_news,
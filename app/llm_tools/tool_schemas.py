@@ -24,6 +24,21 @@ TOOL_GET_STOCK_PRICE = {
     }
 }
 
+TOOL_GET_STOCK_PRICES = {
+    "name": "get_stock_prices",
+    "description": "Fetches the current trading prices for several publicly traded company stock symbols at once (e.g., AAPL, MSFT, NVDA) using a single Yahoo Finance request. Prefer this over repeated `get_stock_price` calls whenever two or more stock prices are needed. Do NOT use for cryptocurrencies.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "symbols": {
+                "type": "string",
+                "description": "Comma-separated stock ticker symbols (e.g., \"AAPL,MSFT,NVDA\")."
+            }
+        },
+        "required": ["symbols"]
+    }
+}
+
 TOOL_GET_CRYPTO_PRICE = {
     "name": "get_crypto_price",
     "description": "Fetches the current price for a specific cryptocurrency symbol (e.g., BTC for Bitcoin, ETH for Ethereum) against a market currency (defaults to USD) using Yahoo Finance data (e.g., symbol 'BTC', market 'USD' becomes 'BTC-USD' for lookup). Use this ONLY for cryptocurrencies.",
@@ -266,6 +281,7 @@ TOOL_GET_PORTFOLIO_PNL = {
 
 AVAILABLE_TOOLS_SCHEMAS = [
     TOOL_GET_STOCK_PRICE,
+    TOOL_GET_STOCK_PRICES,
     TOOL_GET_CRYPTO_PRICE,
     TOOL_GET_COMPANY_OVERVIEW,
     TOOL_GET_FINANCIAL_NEWS,
@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.logging_setup import configure_logging
 from app.db.session import engine, Base
 from app.models import user
 from app.models import portfolio
@@ -14,6 +15,11 @@ from app.routes import chat_router
 from app.routes import financial_router
 from app.routes import sentiment_router
 from app.routes import markets_router
+from app.services.llm_provider_service import llm_service
+from app.services.news_service import close_news_client
+from app.services.prediction_service import shutdown_fit_pool, start_fit_pool
+
+log_listener = configure_logging()
 
 Base.metadata.create_all(bind=engine)
 
@@ -42,6 +48,21 @@ app.include_router(sentiment_router.router)
 app.include_router(markets_router.router)
 
 
+@app.on_event("startup")
+async def warm_worker_pools():
+    """Starts the Prophet fit workers early when `PROPHET_WARM_FIT_POOL` is enabled."""
+    start_fit_pool()
+
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Closes the shared outbound clients and worker pools and flushes queued log records on shutdown."""
+    await llm_service.aclose()
+    await close_news_client()
+    shutdown_fit_pool()
+    log_listener.stop()
+
+
 @app.get("/")
 async def root():
     """Provides a simple welcome message for the root endpoint."""
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import AsyncGenerator
+from contextlib import aclosing
 
 from app.schemas.chat_schemas import ChatRequest, ChatResponse, ChatMessage
 from app.services.rag_service import rag_service
@@ -33,10 +34,15 @@ async def ask_chatbot(
         )
         
         async def safe_generator_wrapper(generator: AsyncGenerator[str, None]):
-            """Wraps the generator to catch errors during streaming."""
+            """Wraps the generator to catch errors during streaming.
+
+            The wrapped generator is closed as soon as this one stops, so a
+            client disconnect releases its LLM stream slot right away.
+            """
             try:
-                async for chunk in generator:
-                    yield chunk
+                async with aclosing(generator) as stream:
+                    async for chunk in stream:
+                        yield chunk
             except HTTPException as he:
                 print(f"HTTPException during stream: {he.detail}")
                 yield f"\nSTREAM_ERROR: An HTTPException occurred: {he.detail}\n"
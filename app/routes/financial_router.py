@@ -262,13 +262,15 @@ async def get_crypto_exchange_rate_endpoint(
 @router.get("/crypto/{symbol}/history/daily", summary="Get Daily Cryptocurrency Time Series")
 async def get_daily_crypto_data_endpoint(
     symbol: str = Path(..., title="Cryptocurrency Symbol", description="e.g., BTC, ETH"),
-    market: str = Query(..., title="Market Currency", description="The market currency (e.g., USD, EUR)")
+    market: str = Query(..., title="Market Currency", description="The market currency (e.g., USD, EUR)"),
+    outputsize: Literal['compact', 'full'] = Query('full', description="Number of data points.")
 ):
     """Fetches daily time series for a digital currency.
     
     Args:
         symbol (str): The cryptocurrency symbol.
         market (str): The market currency for the pair (e.g., USD).
+        outputsize (Literal): 'compact' for 100 data points, 'full' for complete history.
         
     Returns:
         dict: An object containing metadata and the daily time series data.
@@ -277,7 +279,7 @@ async def get_daily_crypto_data_endpoint(
         HTTPException: 404 if data for the crypto pair cannot be found.
     """
     key_name = f"Time Series (Digital Currency Daily)"
-    data = await financial_service.get_daily_crypto_data(symbol, market)
+    data = await financial_service.get_daily_crypto_data(symbol, market, outputsize)
     if data and key_name in data:
         return data
     raise HTTPException(status_code=404, detail=f"Daily crypto data not found for {symbol} in market {market} or API error: {data}")
@@ -13,12 +13,11 @@ from app.services.portfolio_service import compute_portfolio_value
 
 from app.crud.transaction import create_transaction, get_transactions
 from app.schemas.transaction import Transaction, TransactionCreate, TransactionUpdate
-from app.services.portfolio_pnl_service import compute_pnl
+from app.services.portfolio_pnl_service import compute_pnl, invalidate_pnl_cache
 
 from app.services.llm_provider_service import llm_service
 
 from app.services.portfolio_service import get_portfolio_24h_change_percentage
-from app.services.llm_provider_service import llm_service
 from app.models.user import User
 
 from datetime import date
@@ -201,7 +200,9 @@ def add_transaction(
     p = crud_pf.get_portfolio(db, pf_id)
     if not p or p.user_id != current_user.id:
         raise HTTPException(404, "Portfolio not found")
-    return crud_tx.create_transaction(db, pf_id, tx_in)
+    tx = crud_tx.create_transaction(db, pf_id, tx_in)
+    invalidate_pnl_cache(pf_id)
+    return tx
 
 
 @router.get(
@@ -331,6 +332,7 @@ def update_transaction(
     tx = crud_tx.update_transaction(db, tx_id, tx_in)
     if not tx:
         raise HTTPException(404, "Transaction not found")
+    invalidate_pnl_cache(tx.portfolio_id)
     return tx
 
 @router.delete(
@@ -361,6 +363,7 @@ def delete_transaction(
     success = crud_tx.delete_transaction(db, tx_id)
     if not success:
         raise HTTPException(404, "Transaction not found")
+    invalidate_pnl_cache(pf_id)
     return
 
 @router.get("/positions/search-by-symbol", response_model=List[Position])
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List
+from typing import Dict, List, Union
 from datetime import datetime
 from app.services.prediction_service import prediction_service
 from app.schemas.prediction import ForecastPoint
@@ -7,6 +7,38 @@ from app.core.dependencies import get_current_user
 
 router = APIRouter(prefix="/forecast", tags=["Forecast"])
 
+@router.get(
+    "/batch",
+    response_model=Dict[str, Union[List[ForecastPoint], Dict[str, str]]],
+    summary="Forecast next N business days for several symbols"
+)
+async def get_forecasts_batch(
+    symbols: str = Query(..., description="Comma-separated stock symbols e.g., AAPL,MSFT"),
+    periods: int = Query(10, gt=0, le=30),
+    current_user = Depends(get_current_user)
+):
+    """Generates price forecasts for several stock symbols in one request.
+
+    The symbols are forecast concurrently. A symbol that cannot be forecast
+    is reported with an error message instead of failing the whole batch.
+
+    Args:
+        symbols (str): Comma-separated stock ticker symbols to forecast.
+        periods (int): The number of future business days to predict.
+        current_user: The authenticated user dependency.
+
+    Returns:
+        Dict[str, Union[List[ForecastPoint], Dict[str, str]]]: The forecast
+            points, or an error message, keyed by symbol.
+
+    Raises:
+        HTTPException: 400 if no symbols are given.
+    """
+    symbol_list = [s.strip().upper() for s in symbols.split(',') if s.strip()]
+    if not symbol_list:
+        raise HTTPException(400, "No symbols provided")
+    return await prediction_service.forecast_many(symbol_list, periods=periods)
+
 @router.get(
     "/{symbol}",
     response_model=List[ForecastPoint],
@@ -8,6 +8,7 @@ from app.core.dependencies import get_current_user
 from app.db.session import get_db
 from app.models.user import User as UserModel
 from app.schemas.user import User, UserCreate, UserUpdate
+from app.services.rag_service import rag_service
 
 router = APIRouter(
     prefix="/users",
@@ -139,7 +140,9 @@ def update_user(
         raise HTTPException(404, "User not found")
     if db_user.id != current_user.id:
         raise HTTPException(403, "Not enough permissions")
-    return crud_user.update_user(db, db_user, user_in)
+    updated_user = crud_user.update_user(db, db_user, user_in)
+    rag_service.invalidate_user_profile(user_id)
+    return updated_user
 
 @router.delete(
     "/{user_id}",
@@ -169,4 +172,5 @@ def delete_user(
     if db_user.id != current_user.id:
         raise HTTPException(403, "Not enough permissions")
     crud_user.delete_user(db, db_user)
+    rag_service.invalidate_user_profile(user_id)
     return
\ No newline at end of file
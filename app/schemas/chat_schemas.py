@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 
 class ChatMessage(BaseModel):
     """Represents a single message in a chat history."""
@@ -13,4 +13,18 @@ class ChatRequest(BaseModel):
     
 class ChatResponse(BaseModel):
     """Defines the structure for the chatbot's final response."""
-    answer: str
\ No newline at end of file
+    answer: str
+
+class ToolCall(BaseModel):
+    """A single tool invocation requested by the chat agent."""
+    tool_name: str
+    arguments: Dict[str, Any] = {}
+
+class AgentDecision(BaseModel):
+    """The structured output of one chat-agent reasoning step.
+
+    Either `tool_calls` lists the tools to run next, or `answer` holds the
+    final answer or clarifying question for the user.
+    """
+    tool_calls: List[ToolCall] = []
+    answer: Optional[str] = None
@@ -1,13 +1,137 @@
 from datetime import datetime, timedelta
+import functools
+import hashlib
+import logging
+import os
 import time
+import numpy as np
 import pandas as pd
 import yfinance as yf
 import asyncio
 from typing import Dict, List, Optional, Any
-import traceback
+from types import MappingProxyType
+from cachetools import TTLCache
 
 from app.core.config import settings
-from app.services.web_search_service import web_search_service
+from app.services.web_search_service import NO_SEARCH_RESULTS, web_search_service
+from app.utils.async_cache import async_ttl_cache
+
+logger = logging.getLogger(__name__)
+
+_EMPTY = MappingProxyType({})
+
+_OHLCV_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+_TREASURY_SYMBOL_MAP = MappingProxyType({
+    '3month': '^IRX',
+    '2year': '^UST2Y',
+    '5year': '^FVX',
+    '7year': None,
+    '10year': '^TNX',
+    '30year': '^TYX'
+})
+
+_YF_INTERVAL_MAP = MappingProxyType({'daily': '1d', 'weekly': '1wk', 'monthly': '1mo'})
+
+_TICKER_CACHE: TTLCache = TTLCache(maxsize=512, ttl=600)
+
+# Entries are read-only views; callers get their own dict(...) copy.
+_QUOTE_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=15)
+
+# Histories merged with a freshly fetched tail, reused briefly so concurrent
+# requests don't each re-fetch the tail.
+_RECENT_HISTORY_CACHE: TTLCache = TTLCache(maxsize=512, ttl=60)
+
+# Short period re-fetched on top of a cached history to pick up the latest
+# (possibly still forming) bars, per history interval.
+_HISTORY_TAIL_PERIODS = MappingProxyType({'1d': '5d', '1wk': '1mo', '1mo': '3mo'})
+
+_DAY_NS = 24 * 60 * 60 * 1_000_000_000
+
+# Bar sizes tried in order by `get_price_change_24h`.
+_PRICE_CHANGE_INTERVALS = ("1h", "15m", "1d")
+
+_SPARSE_24H_NOTE = "Used earliest available price in the fetched window as 24h ago reference due to sparse data."
+
+# Placeholder payloads; endpoints hand out copies so callers cannot alter the shared text.
+_SMA_NOTE = MappingProxyType({"Note": "SMA calculation needs to be implemented separately using historical data from yfinance."})
+_EMA_NOTE = MappingProxyType({"Note": "EMA calculation needs to be implemented separately using historical data from yfinance."})
+_REAL_GDP_NOTE = MappingProxyType({"Note": "Real GDP data is not directly available via yfinance. Check sources like FRED."})
+_CPI_NOTE = MappingProxyType({"Note": "CPI data is not directly available via yfinance. Check sources like FRED."})
+_INFLATION_NOTE = MappingProxyType({"Note": "Inflation data is not directly available via yfinance. Check sources like FRED."})
+
+@functools.lru_cache(maxsize=256)
+def _crypto_rating_note_text(symbol: str) -> str:
+    """Builds (once per symbol) the placeholder text for crypto ratings."""
+    return f"Crypto ratings (FCAS) are not available through yfinance for {symbol}."
+
+_LAST_REFRESHED_STAMP = [float('-inf'), ""]
+
+def _last_refreshed_stamp() -> str:
+    """Returns the "Last Refreshed" metadata timestamp, reformatted at most once per second."""
+    now = time.monotonic()
+    if now - _LAST_REFRESHED_STAMP[0] >= 1.0:
+        _LAST_REFRESHED_STAMP[:] = [now, datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")]
+    return _LAST_REFRESHED_STAMP[1]
+
+def _index_to_utc(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """Returns `index` in UTC, skipping the conversion copy when it already is."""
+    if index.tz is None:
+        return index.tz_localize('UTC')
+    if str(index.tz) == 'UTC':
+        return index
+    return index.tz_convert('UTC')
+
+def _compute_24h_changes(closes: np.ndarray, timestamps_ns: np.ndarray, window_ns: int = _DAY_NS):
+    """Locates the latest and 24h-ago closes for every row of a price matrix.
+
+    Operates on a (n_symbols, n_timestamps) matrix in which missing bars are
+    NaN, so all symbols are resolved in a handful of array operations rather
+    than a Python loop per symbol.
+
+    Args:
+        closes (np.ndarray): Close prices, one row per symbol.
+        timestamps_ns (np.ndarray): Ascending int64 epoch-nanosecond timestamps
+                                    shared by all rows.
+        window_ns (int): The look-back window in nanoseconds.
+
+    Returns:
+        Tuple[np.ndarray, ...]: Latest close, its column index, reference close,
+            its column index, a flag marking rows that had no bar old enough
+            (the earliest bar is used instead), and the valid-bar count per row.
+    """
+    n_symbols, n_timestamps = closes.shape
+    rows = np.arange(n_symbols)
+    valid = ~np.isnan(closes)
+    valid_counts = valid.sum(axis=1)
+
+    latest_idx = n_timestamps - 1 - np.argmax(valid[:, ::-1], axis=1)
+    target_ns = timestamps_ns[latest_idx] - window_ns
+
+    eligible = valid & (timestamps_ns[None, :] <= target_ns[:, None])
+    has_reference = eligible.any(axis=1)
+    reference_idx = np.where(
+        has_reference,
+        n_timestamps - 1 - np.argmax(eligible[:, ::-1], axis=1),
+        np.argmax(valid, axis=1),
+    )
+    return closes[rows, latest_idx], latest_idx, closes[rows, reference_idx], reference_idx, ~has_reference, valid_counts
+
+def _history_cache_path(symbol: str, history_kwargs: Dict[str, Any]) -> str:
+    """Maps a history request to its file in the on-disk history cache."""
+    key = repr((symbol.upper(), sorted(history_kwargs.items())))
+    return os.path.join(settings.YF_HISTORY_CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + ".pkl")
+
+def _write_history_cache(df: pd.DataFrame, cache_path: str) -> None:
+    """Atomically pickles a history DataFrame to `cache_path`."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, cache_path)
+
+def _is_cacheable(result: Any) -> bool:
+    """Keeps error payloads out of the response caches so failures are retried."""
+    return bool(result) and not (isinstance(result, dict) and "Error Message" in result)
 
 class FinancialDataService:
     def __init__(self):
@@ -30,6 +154,122 @@ class FinancialDataService:
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(None, lambda: func(*args, **kwargs))
 
+    def _ticker(self, symbol: str) -> yf.Ticker:
+        """Returns a cached yfinance Ticker for the symbol, creating it if needed.
+
+        Args:
+            symbol (str): The yfinance symbol (e.g., "AAPL", "BTC-USD").
+
+        Returns:
+            yf.Ticker: The shared Ticker instance for the symbol.
+        """
+        ticker = _TICKER_CACHE.get(symbol)
+        if ticker is None:
+            ticker = yf.Ticker(symbol)
+            _TICKER_CACHE[symbol] = ticker
+        return ticker
+
+    async def _cached_history(self, symbol: str, **history_kwargs) -> pd.DataFrame:
+        """Fetches `Ticker.history`, backed by a persistent on-disk cache.
+
+        The full history is cached on disk and re-downloaded once it is older
+        than `YF_HISTORY_CACHE_TTL_SECONDS`; the disk cache survives restarts
+        and is shared by all workers on the host. Within that window only a
+        short recent period is fetched and spliced over the cached frame (see
+        `_refresh_history_tail`), so the latest bar is always current. The
+        merged frame is reused for up to a minute.
+
+        Args:
+            symbol (str): The yfinance symbol.
+            **history_kwargs: Keyword arguments for `Ticker.history`.
+
+        Returns:
+            pd.DataFrame: The historical price data.
+        """
+        cache_path = _history_cache_path(symbol, history_kwargs)
+        recent = _RECENT_HISTORY_CACHE.get(cache_path)
+        if recent is not None:
+            return recent.copy(deep=False)
+
+        base = None
+        try:
+            if time.time() - os.path.getmtime(cache_path) < settings.YF_HISTORY_CACHE_TTL_SECONDS:
+                base = await self._run_sync(pd.read_pickle, cache_path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning("Ignoring unreadable history cache entry for %s (%s): %s", symbol, cache_path, e)
+
+        if base is not None:
+            df = await self._refresh_history_tail(symbol, base, history_kwargs)
+        else:
+            df = await self._run_sync(self._ticker(symbol).history, **history_kwargs)
+            if not df.empty:
+                try:
+                    await self._run_sync(_write_history_cache, df, cache_path)
+                except OSError as e:
+                    logger.warning("Could not write history cache entry for %s: %s", symbol, e)
+
+        if not df.empty:
+            _RECENT_HISTORY_CACHE[cache_path] = df
+        return df.copy(deep=False)
+
+    async def _refresh_history_tail(self, symbol: str, base: pd.DataFrame, history_kwargs: Dict[str, Any]) -> pd.DataFrame:
+        """Replaces the last bars of a cached history with freshly fetched ones.
+
+        Args:
+            symbol (str): The yfinance symbol.
+            base (pd.DataFrame): The history read from the disk cache.
+            history_kwargs (Dict[str, Any]): The original `Ticker.history`
+                                             arguments.
+
+        Returns:
+            pd.DataFrame: `base` with every bar from the start of the fresh
+                          tail onwards taken from the tail; `base` unchanged
+                          if the request has a fixed end or the fetch fails.
+        """
+        tail_period = _HISTORY_TAIL_PERIODS.get(history_kwargs.get('interval', '1d'))
+        if tail_period is None or base.empty or 'end' in history_kwargs:
+            return base
+
+        tail_kwargs = {k: v for k, v in history_kwargs.items() if k not in ('period', 'start')}
+        tail_kwargs['period'] = tail_period
+        try:
+            tail = await self._run_sync(self._ticker(symbol).history, **tail_kwargs)
+        except Exception as e:
+            logger.warning("Could not refresh recent history for %s, serving cached bars: %s", symbol, e)
+            return base
+        if tail.empty:
+            return base
+        return pd.concat([base[base.index < tail.index[0]], tail])
+
+    @async_ttl_cache(ttl=30, maxsize=512, should_cache=bool)
+    async def _get_info_cached(self, symbol: str) -> Dict[str, Any]:
+        """Fetches `Ticker.info` for a symbol, memoized for 30 seconds.
+
+        Args:
+            symbol (str): The yfinance symbol.
+
+        Returns:
+            Dict[str, Any]: The info dictionary reported by yfinance.
+        """
+        ticker = self._ticker(symbol)
+        return await self._run_sync(lambda: ticker.info)
+
+    def _project_ohlcv(self, df_history: pd.DataFrame) -> pd.DataFrame:
+        """Drops every column except OHLCV from a yfinance history frame.
+
+        Adjusted close, dividends and splits are unused for crypto and FX
+        series, so they are discarded before any further copies are made.
+
+        Args:
+            df_history (pd.DataFrame): The raw history DataFrame.
+
+        Returns:
+            pd.DataFrame: A copy containing only the available OHLCV columns.
+        """
+        return df_history.loc[:, [col for col in _OHLCV_COLUMNS if col in df_history.columns]].copy()
+
     def _format_history_data(self, df_history: pd.DataFrame, interval_is_daily=False, is_fx=False, is_crypto=False, symbol_meta: Optional[str] = None):
         """Formats a pandas DataFrame from yfinance into a dictionary.
 
@@ -47,41 +287,45 @@ class FinancialDataService:
             Dict[str, Dict]: A dictionary where keys are dates and values are
                              dictionaries of OHLCV data.
         """
-        formatted_data = {}
-        if df_history.empty:
-            return formatted_data
-
-        for index_date, row in df_history.iterrows():
-            if isinstance(index_date, (datetime, pd.Timestamp)):
-                 date_key = index_date.strftime("%Y-%m-%d %H:%M:%S") if not interval_is_daily else index_date.strftime("%Y-%m-%d")
-            else:
-                continue 
-
-            entry = {
-                '1. open': str(row.get('Open', 'N/A')),
-                '2. high': str(row.get('High', 'N/A')),
-                '3. low': str(row.get('Low', 'N/A')),
-                '4. close': str(row.get('Close', 'N/A')),
-            }
-            if not is_fx:
-                entry['5. volume'] = str(row.get('Volume', 'N/A'))
-            
-            if interval_is_daily and not is_fx and not is_crypto:
-                entry['5. adjusted close'] = str(row.get('Adj Close', row.get('Close', 'N/A')))
-                entry['7. dividend amount'] = str(row.get('Dividends', '0.0'))
-                entry['8. split coefficient'] = str(row.get('Stock Splits', '0.0'))
-            
-            if is_crypto and interval_is_daily:
-                market_in_symbol = symbol_meta.split('-')[-1] if symbol_meta else settings.ALPHA_VANTAGE_CRYPTO_MARKET_DEFAULT.upper()
-                entry[f'1a. open ({market_in_symbol})'] = str(row.get('Open', 'N/A'))
-                entry[f'2a. high ({market_in_symbol})'] = str(row.get('High', 'N/A'))
-                entry[f'3a. low ({market_in_symbol})'] = str(row.get('Low', 'N/A'))
-                entry[f'4a. close ({market_in_symbol})'] = str(row.get('Close', 'N/A'))
-                entry[f'5. volume'] = str(row.get('Volume', 'N/A'))
-                entry[f'6. market cap ({market_in_symbol})'] = "N/A"
+        if df_history.empty or not isinstance(df_history.index, pd.DatetimeIndex):
+            return {}
 
-            formatted_data[date_key] = entry
-        return formatted_data
+        row_count = len(df_history)
+
+        def _column_as_str(column: str, default: str = 'N/A') -> List[str]:
+            if column in df_history.columns:
+                return [str(value) for value in df_history[column].tolist()]
+            return [default] * row_count
+
+        opens = _column_as_str('Open')
+        highs = _column_as_str('High')
+        lows = _column_as_str('Low')
+        closes = _column_as_str('Close')
+
+        fields = [('1. open', opens), ('2. high', highs), ('3. low', lows), ('4. close', closes)]
+        if not is_fx:
+            fields.append(('5. volume', _column_as_str('Volume')))
+
+        if interval_is_daily and not is_fx and not is_crypto:
+            adjusted_closes = _column_as_str('Adj Close') if 'Adj Close' in df_history.columns else closes
+            fields.append(('5. adjusted close', adjusted_closes))
+            fields.append(('7. dividend amount', _column_as_str('Dividends', '0.0')))
+            fields.append(('8. split coefficient', _column_as_str('Stock Splits', '0.0')))
+
+        if is_crypto and interval_is_daily:
+            market_in_symbol = symbol_meta.split('-')[-1] if symbol_meta else settings.ALPHA_VANTAGE_CRYPTO_MARKET_DEFAULT.upper()
+            fields.append((f'1a. open ({market_in_symbol})', opens))
+            fields.append((f'2a. high ({market_in_symbol})', highs))
+            fields.append((f'3a. low ({market_in_symbol})', lows))
+            fields.append((f'4a. close ({market_in_symbol})', closes))
+            fields.append((f'6. market cap ({market_in_symbol})', ["N/A"] * row_count))
+
+        date_keys = df_history.index.strftime("%Y-%m-%d" if interval_is_daily else "%Y-%m-%d %H:%M:%S").tolist()
+        field_names = [name for name, _ in fields]
+        return {
+            date_key: dict(zip(field_names, values))
+            for date_key, values in zip(date_keys, zip(*(column for _, column in fields)))
+        }
 
 
     async def get_stock_quote(self, symbol: str) -> Optional[Dict[str, str]]:
@@ -89,6 +333,8 @@ class FinancialDataService:
 
         Tries to get live market data from the ticker's info. If that's not
         available, it falls back to the most recent historical data.
+        Successful quotes are cached for 15 seconds per symbol, shared with
+        `get_stock_quotes_batch`.
 
         Args:
             symbol (str): The stock symbol (e.g., "AAPL").
@@ -97,8 +343,18 @@ class FinancialDataService:
             Optional[Dict[str, str]]: A dictionary containing quote data,
                                       or an error message.
         """
+        cached = _QUOTE_CACHE.get(symbol.upper())
+        if cached is not None:
+            return dict(cached)
+        quote = await self._fetch_stock_quote(symbol)
+        if _is_cacheable(quote):
+            _QUOTE_CACHE[symbol.upper()] = MappingProxyType(dict(quote))
+        return quote
+
+    async def _fetch_stock_quote(self, symbol: str) -> Optional[Dict[str, str]]:
+        """Fetches a quote for `symbol` from yfinance, bypassing the quote cache."""
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             info = await self._run_sync(lambda: ticker.info)
 
             if info and info.get('regularMarketPrice') is not None:
@@ -118,32 +374,103 @@ class FinancialDataService:
             else:
                 hist = await self._run_sync(ticker.history, period="2d", interval="1d")
                 if not hist.empty:
-                    latest = hist.iloc[-1]
-                    prev_close_val = hist.iloc[-2]['Close'] if len(hist) > 1 else latest['Open']
-                    current_price_val = latest.get('Close')
-
-                    change_val = (current_price_val - prev_close_val) if current_price_val is not None and prev_close_val is not None else None
-                    change_percent_val = (change_val / prev_close_val * 100) if change_val is not None and prev_close_val and prev_close_val != 0 else None
-                    
-                    return {
-                        "01. symbol": symbol.upper(),
-                        "02. open": str(latest.get('Open', 'N/A')),
-                        "03. high": str(latest.get('High', 'N/A')),
-                        "04. low": str(latest.get('Low', 'N/A')),
-                        "05. price": str(current_price_val if current_price_val is not None else 'N/A'),
-                        "06. volume": str(latest.get('Volume', 'N/A')),
-                        "07. latest trading day": latest.name.strftime('%Y-%m-%d') if latest.name else "N/A",
-                        "08. previous close": str(prev_close_val if prev_close_val is not None else 'N/A'),
-                        "09. change": str(change_val if change_val is not None else 'N/A'),
-                        "10. change percent": f"{change_percent_val:.4f}%" if change_percent_val is not None else "N/A"
-                    }
-            print(f"Error fetching stock quote for {symbol}: No comprehensive data in Ticker.info and history fallback failed or incomplete.")
+                    return self._quote_from_history(symbol, hist)
+            logger.error("Error fetching stock quote for %s: No comprehensive data in Ticker.info and history fallback failed or incomplete.", symbol)
             return {"Error Message": f"Could not retrieve a valid quote for {symbol.upper()}. The symbol may be incorrect, delisted, or data may be temporarily unavailable."}
 
         except Exception as e:
-            print(f"Exception fetching stock quote for {symbol} using yfinance: {e}")
+            logger.error("Exception fetching stock quote for %s using yfinance: %s", symbol, e)
             return {"Error Message": f"An error occurred while fetching quote for {symbol.upper()}: {str(e)}"}
 
+    async def get_stock_quotes_batch(self, symbols: List[str]) -> Dict[str, Dict[str, str]]:
+        """Fetches quotes for several stocks at once.
+
+        Symbols with a cached quote are served from the quote cache; daily
+        bars for the rest come from a single `yf.download` call instead of
+        one quote request per symbol. Symbols the batch could not cover fall
+        back to `get_stock_quote`.
+
+        Args:
+            symbols (List[str]): The stock symbols (e.g., ["AAPL", "MSFT"]).
+
+        Returns:
+            Dict[str, Dict[str, str]]: Quote data (or an error message) keyed
+                                       by the requested symbol.
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        if not unique_symbols:
+            return {}
+
+        results: Dict[str, Dict[str, str]] = {}
+        for sym in unique_symbols:
+            cached = _QUOTE_CACHE.get(sym.upper())
+            if cached is not None:
+                results[sym] = dict(cached)
+        to_download = [sym for sym in unique_symbols if sym not in results]
+        if not to_download:
+            return results
+
+        try:
+            df = await self._run_sync(
+                yf.download, tickers=to_download, period="5d", interval="1d",
+                threads=True, progress=False, auto_adjust=False, group_by='ticker'
+            )
+        except Exception as e:
+            logger.error("Error batch-downloading quotes for %s using yfinance: %s", to_download, e)
+            df = pd.DataFrame()
+
+        if not df.empty:
+            for sym in to_download:
+                if isinstance(df.columns, pd.MultiIndex):
+                    if sym not in df.columns.get_level_values(0):
+                        continue
+                    hist = df[sym]
+                elif len(to_download) == 1:
+                    hist = df
+                else:
+                    continue
+                hist = hist.dropna(subset=['Close'])
+                if not hist.empty:
+                    quote = self._quote_from_history(sym, hist)
+                    _QUOTE_CACHE[sym.upper()] = MappingProxyType(dict(quote))
+                    results[sym] = quote
+
+        missing = [sym for sym in unique_symbols if sym not in results]
+        if missing:
+            fallbacks = await asyncio.gather(*(self.get_stock_quote(sym) for sym in missing))
+            results.update(zip(missing, fallbacks))
+        return results
+
+    def _quote_from_history(self, symbol: str, hist: pd.DataFrame) -> Dict[str, str]:
+        """Builds a quote payload from recent daily bars.
+
+        Args:
+            symbol (str): The stock symbol.
+            hist (pd.DataFrame): Non-empty daily OHLCV history, oldest first.
+
+        Returns:
+            Dict[str, str]: The quote data, in the same shape as `get_stock_quote`.
+        """
+        latest = hist.iloc[-1]
+        prev_close_val = hist.iloc[-2]['Close'] if len(hist) > 1 else latest['Open']
+        current_price_val = latest.get('Close')
+
+        change_val = (current_price_val - prev_close_val) if current_price_val is not None and prev_close_val is not None else None
+        change_percent_val = (change_val / prev_close_val * 100) if change_val is not None and prev_close_val and prev_close_val != 0 else None
+
+        return {
+            "01. symbol": symbol.upper(),
+            "02. open": str(latest.get('Open', 'N/A')),
+            "03. high": str(latest.get('High', 'N/A')),
+            "04. low": str(latest.get('Low', 'N/A')),
+            "05. price": str(current_price_val if current_price_val is not None else 'N/A'),
+            "06. volume": str(latest.get('Volume', 'N/A')),
+            "07. latest trading day": latest.name.strftime('%Y-%m-%d') if latest.name else "N/A",
+            "08. previous close": str(prev_close_val if prev_close_val is not None else 'N/A'),
+            "09. change": str(change_val if change_val is not None else 'N/A'),
+            "10. change percent": f"{change_percent_val:.4f}%" if change_percent_val is not None else "N/A"
+        }
+
     async def get_daily_adjusted_stock_data(self, symbol: str, outputsize: str = 'compact'):
         """Fetches daily time series data, adjusted for splits and dividends.
 
@@ -156,10 +483,9 @@ class FinancialDataService:
             Dict: A dictionary containing metadata and the daily time series data.
         """
         try:
-            ticker = yf.Ticker(symbol)
             period = "max" 
             
-            df = await self._run_sync(ticker.history, period=period, interval="1d", actions=True, auto_adjust=False)
+            df = await self._cached_history(symbol, period=period, interval="1d", actions=True, auto_adjust=False)
             if df.empty:
                 return {"Error Message": f"No daily data found for symbol {symbol}."}
             
@@ -180,7 +506,7 @@ class FinancialDataService:
                 "Time Series (Daily)": self._format_history_data(df.sort_index(ascending=True), interval_is_daily=True) 
             }
         except Exception as e:
-            print(f"Error fetching daily adjusted stock data for {symbol} from yfinance: {e}")
+            logger.error("Error fetching daily adjusted stock data for %s from yfinance: %s", symbol, e)
             return {"Error Message": f"Failed to retrieve daily adjusted stock data for {symbol}: {str(e)}"}
 
     async def get_intraday_stock_data(self, symbol: str, interval: str = '5min', outputsize: str = 'compact'):
@@ -207,7 +533,7 @@ class FinancialDataService:
             else: period = "59d" 
 
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             df = await self._run_sync(ticker.history, period=period, interval=yf_interval, actions=False, auto_adjust=False)
             if df.empty:
                 return {"Error Message": f"No intraday data found for {symbol} with interval {interval}."}
@@ -226,7 +552,7 @@ class FinancialDataService:
                 time_series_key: self._format_history_data(df.sort_index(ascending=True))
             }
         except Exception as e:
-            print(f"Error fetching intraday stock data for {symbol} ({interval}): {e}")
+            logger.error("Error fetching intraday stock data for %s (%s): %s", symbol, interval, e)
             return {"Error Message": f"Failed to retrieve intraday data for {symbol} ({interval}): {str(e)}"}
 
     async def get_company_overview(self, symbol: str):
@@ -239,7 +565,7 @@ class FinancialDataService:
             Dict: A dictionary containing company information and financial ratios.
         """
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             info = await self._run_sync(lambda: ticker.info)
             if not info or info.get('quoteType') == 'NONE' or not info.get('longName'):
                  return {"Error Message": f"No company overview data found for symbol {symbol}. It may be invalid or not a stock."}
@@ -296,7 +622,7 @@ class FinancialDataService:
                         overview[key] = str(overview[key])
             return overview
         except Exception as e:
-            print(f"Error fetching company overview for {symbol} from yfinance: {e}")
+            logger.error("Error fetching company overview for %s from yfinance: %s", symbol, e)
             return {"Error Message": f"Failed to retrieve company overview for {symbol}: {str(e)}"}
 
     async def get_daily_series(self, symbol: str, outputsize: str = "compact"):
@@ -311,9 +637,8 @@ class FinancialDataService:
             Dict: A dictionary of daily OHLCV data.
         """
         try:
-            ticker = yf.Ticker(symbol)
             period = "max"
-            df = await self._run_sync(ticker.history, period=period, interval="1d", auto_adjust=False, actions=False)
+            df = await self._cached_history(symbol, period=period, interval="1d", auto_adjust=False, actions=False)
             if df.empty:
                 return {}
             
@@ -323,7 +648,7 @@ class FinancialDataService:
             
             return self._format_history_data(df.sort_index(ascending=True), interval_is_daily=True)
         except Exception as e:
-            print(f"Error fetching daily series for {symbol} from yfinance: {e}")
+            logger.error("Error fetching daily series for %s from yfinance: %s", symbol, e)
             return {}
 
     def _format_financial_statement(self, df_statement: pd.DataFrame, report_type: str):
@@ -364,14 +689,14 @@ class FinancialDataService:
                   quarterly reports.
         """
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             annual_is = await self._run_sync(lambda: ticker.income_stmt)
             quarterly_is = await self._run_sync(lambda: ticker.quarterly_income_stmt)
             
             if annual_is is None or annual_is.empty:
-                print(f"Warning: Annual income statement for {symbol} is None or empty.")
+                logger.warning("Annual income statement for %s is None or empty.", symbol)
             if quarterly_is is None or quarterly_is.empty:
-                print(f"Warning: Quarterly income statement for {symbol} is None or empty.")
+                logger.warning("Quarterly income statement for %s is None or empty.", symbol)
 
             return {
                 "symbol": symbol.upper(),
@@ -379,7 +704,7 @@ class FinancialDataService:
                 "quarterlyReports": self._format_financial_statement(quarterly_is if quarterly_is is not None else pd.DataFrame(), "Income Statement")
             }
         except Exception as e:
-            print(f"Error fetching income statement for {symbol} from yfinance: {e}")
+            logger.error("Error fetching income statement for %s from yfinance: %s", symbol, e)
             return {"Error Message": f"Failed to retrieve income statement for {symbol}: {str(e)}"}
 
     async def get_balance_sheet(self, symbol: str):
@@ -393,14 +718,14 @@ class FinancialDataService:
                   quarterly reports.
         """
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             annual_bs = await self._run_sync(lambda: ticker.balance_sheet)
             quarterly_bs = await self._run_sync(lambda: ticker.quarterly_balance_sheet)
 
             if annual_bs is None or annual_bs.empty:
-                print(f"Warning: Annual balance sheet for {symbol} is None or empty.")
+                logger.warning("Annual balance sheet for %s is None or empty.", symbol)
             if quarterly_bs is None or quarterly_bs.empty:
-                print(f"Warning: Quarterly balance sheet for {symbol} is None or empty.")
+                logger.warning("Quarterly balance sheet for %s is None or empty.", symbol)
                 
             return {
                 "symbol": symbol.upper(),
@@ -408,7 +733,7 @@ class FinancialDataService:
                 "quarterlyReports": self._format_financial_statement(quarterly_bs if quarterly_bs is not None else pd.DataFrame(), "Balance Sheet")
             }
         except Exception as e:
-            print(f"Error fetching balance sheet for {symbol} from yfinance: {e}")
+            logger.error("Error fetching balance sheet for %s from yfinance: %s", symbol, e)
             return {"Error Message": f"Failed to retrieve balance sheet for {symbol}: {str(e)}"}
 
     async def get_cash_flow(self, symbol: str):
@@ -422,14 +747,14 @@ class FinancialDataService:
                   quarterly reports.
         """
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             annual_cf = await self._run_sync(lambda: ticker.cashflow)
             quarterly_cf = await self._run_sync(lambda: ticker.quarterly_cashflow)
 
             if annual_cf is None or annual_cf.empty:
-                print(f"Warning: Annual cash flow for {symbol} is None or empty.")
+                logger.warning("Annual cash flow for %s is None or empty.", symbol)
             if quarterly_cf is None or quarterly_cf.empty:
-                print(f"Warning: Quarterly cash flow for {symbol} is None or empty.")
+                logger.warning("Quarterly cash flow for %s is None or empty.", symbol)
 
             return {
                 "symbol": symbol.upper(),
@@ -437,9 +762,48 @@ class FinancialDataService:
                 "quarterlyReports": self._format_financial_statement(quarterly_cf if quarterly_cf is not None else pd.DataFrame(), "Cash Flow")
             }
         except Exception as e:
-            print(f"Error fetching cash flow for {symbol} from yfinance: {e}")
+            logger.error("Error fetching cash flow for %s from yfinance: %s", symbol, e)
             return {"Error Message": f"Failed to retrieve cash flow statement for {symbol}: {str(e)}"}
 
+    def _extract_earnings_reports(self, df_income: pd.DataFrame) -> List[Dict[str, str]]:
+        """Extracts EPS, net income and revenue rows from an income statement.
+
+        The statement's date columns are ordered newest-first once, on the
+        column index itself, so the reports come out already sorted.
+
+        Args:
+            df_income (pd.DataFrame): Income statement with line items as rows
+                                      and fiscal period end dates as columns.
+
+        Returns:
+            List[Dict[str, str]]: Earnings reports, most recent first.
+        """
+        df_income = df_income.iloc[:, np.argsort(df_income.columns.values)[::-1]]
+
+        def _first_row(*labels: str) -> List[str]:
+            for label in labels:
+                if label in df_income.index:
+                    return [str(value) for value in df_income.loc[label].tolist()]
+            return ['N/A'] * df_income.shape[1]
+
+        fiscal_dates = [
+            col.strftime('%Y-%m-%d') if isinstance(col, pd.Timestamp) else str(col)
+            for col in df_income.columns
+        ]
+        reported_eps = _first_row('Diluted EPS', 'Basic EPS')
+        net_income = _first_row('Net Income', 'Net Income Common Stockholders')
+        revenue = _first_row('Total Revenue', 'Operating Revenue')
+
+        return [
+            {
+                "fiscalDateEnding": fiscal_date,
+                "reportedEPS": eps,
+                "netIncome": income,
+                "reportedRevenue": rev
+            }
+            for fiscal_date, eps, income, rev in zip(fiscal_dates, reported_eps, net_income, revenue)
+        ]
+
     async def get_earnings(self, symbol: str):
         """Fetches historical annual and quarterly earnings data.
 
@@ -452,58 +816,33 @@ class FinancialDataService:
             Dict: A dictionary containing annual and quarterly earnings reports.
         """
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             
             annual_is_df = await self._run_sync(lambda: ticker.income_stmt)
             quarterly_is_df = await self._run_sync(lambda: ticker.quarterly_income_stmt)
 
             annual_reports = []
             if annual_is_df is not None and not annual_is_df.empty:
-                for report_date_col, report_data in annual_is_df.transpose().iterrows():
-                    fiscal_date_str = report_date_col.strftime('%Y-%m-%d') if isinstance(report_date_col, pd.Timestamp) else str(report_date_col)
-                    
-                    reported_eps = report_data.get('Diluted EPS', report_data.get('Basic EPS', 'N/A'))
-                    net_income = report_data.get('Net Income', report_data.get('Net Income Common Stockholders', 'N/A'))
-                    revenue = report_data.get('Total Revenue', report_data.get('Operating Revenue', 'N/A'))
-
-                    annual_reports.append({
-                        "fiscalDateEnding": fiscal_date_str,
-                        "reportedEPS": str(reported_eps), 
-                        "netIncome": str(net_income),
-                        "reportedRevenue": str(revenue)
-                    })
+                annual_reports = self._extract_earnings_reports(annual_is_df)
             else:
-                print(f"Warning: Annual income statement for {symbol} (for earnings extraction) is None or empty.")
+                logger.warning("Annual income statement for %s (for earnings extraction) is None or empty.", symbol)
                 
             quarterly_reports = []
             if quarterly_is_df is not None and not quarterly_is_df.empty:
-                for report_date_col, report_data in quarterly_is_df.transpose().iterrows():
-                    fiscal_date_str = report_date_col.strftime('%Y-%m-%d') if isinstance(report_date_col, pd.Timestamp) else str(report_date_col)
-
-                    reported_eps = report_data.get('Diluted EPS', report_data.get('Basic EPS', 'N/A'))
-                    net_income = report_data.get('Net Income', report_data.get('Net Income Common Stockholders', 'N/A'))
-                    revenue = report_data.get('Total Revenue', report_data.get('Operating Revenue', 'N/A'))
-
-                    quarterly_reports.append({
-                        "fiscalDateEnding": fiscal_date_str,
-                        "reportedEPS": str(reported_eps),
-                        "netIncome": str(net_income),
-                        "reportedRevenue": str(revenue)
-                    })
+                quarterly_reports = self._extract_earnings_reports(quarterly_is_df)
             else:
-                print(f"Warning: Quarterly income statement for {symbol} (for earnings extraction) is None or empty.")
+                logger.warning("Quarterly income statement for %s (for earnings extraction) is None or empty.", symbol)
 
             if not annual_reports and not quarterly_reports:
-                print(f"Warning: No earnings data could be extracted from income statements for {symbol}.")
+                logger.warning("No earnings data could be extracted from income statements for %s.", symbol)
 
             return {
                 "symbol": symbol.upper(),
-                "annualEarnings": sorted(annual_reports, key=lambda x: x['fiscalDateEnding'], reverse=True),
-                "quarterlyEarnings": sorted(quarterly_reports, key=lambda x: x['fiscalDateEnding'], reverse=True)
+                "annualEarnings": annual_reports,
+                "quarterlyEarnings": quarterly_reports
             } 
         except Exception as e:
-            print(f"Error processing earnings from income statements for {symbol} from yfinance: {e}")
-            traceback.print_exc()
+            logger.exception("Error processing earnings from income statements for %s from yfinance: %s", symbol, e)
             return {"Error Message": f"Failed to retrieve/process earnings data for {symbol}: {str(e)}"}
         
     async def get_latest_news_for_stock_web(self, symbol: str, limit: int = 5):
@@ -521,7 +860,7 @@ class FinancialDataService:
             news_query, max_results=limit,
             include_domains=["reuters.com", "bloomberg.com", "wsj.com", "marketwatch.com", "finance.yahoo.com"]
         )
-        return news_context if news_context and "No relevant information" not in news_context else f"No specific news found via web search for {symbol}."
+        return news_context if news_context and news_context != NO_SEARCH_RESULTS else f"No specific news found via web search for {symbol}."
 
     async def get_alpha_vantage_news_sentiment(self, tickers: str = None, topics: str = None, time_from: str = None, time_to: str = None, sort: str = "LATEST", limit: int = 50):
         """Fetches news articles for a given ticker from yfinance.
@@ -543,7 +882,7 @@ class FinancialDataService:
         symbol = tickers.split(',')[0].strip().upper()
 
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             raw_news_list = await self._run_sync(lambda: ticker.news) 
 
             if not raw_news_list:
@@ -551,33 +890,23 @@ class FinancialDataService:
 
             feed_items = []
             for raw_item in raw_news_list[:limit]:
-                content_data = raw_item.get('content', {})
+                content_get = raw_item.get('content', _EMPTY).get
 
-                title = content_data.get('title')
-                
-                canonical_url_data = content_data.get('canonicalUrl', {})
-                url = canonical_url_data.get('url')
+                title = content_get('title')
+                url = content_get('canonicalUrl', _EMPTY).get('url')
+                publisher_name = content_get('provider', _EMPTY).get('displayName')
+                summary = content_get('summary', title)
 
-                provider_data = content_data.get('provider', {})
-                publisher_name = provider_data.get('displayName')
-                
-                summary = content_data.get('summary', title)
-
-                thumbnail_data = content_data.get('thumbnail', {})
-                banner_image_url = None
-                if thumbnail_data:
-                    resolutions = thumbnail_data.get('resolutions', [])
-                    if resolutions:
-                        original_res = next((res for res in resolutions if res.get('tag') == 'original'), None)
-                        if original_res:
-                            banner_image_url = original_res.get('url')
-                        elif resolutions:
-                            banner_image_url = resolutions[0].get('url')
-                    else:
-                        banner_image_url = thumbnail_data.get('originalUrl')
+                thumbnail_data = content_get('thumbnail') or _EMPTY
+                resolutions = thumbnail_data.get('resolutions', ())
+                if resolutions:
+                    chosen_res = next((res for res in resolutions if res.get('tag') == 'original'), resolutions[0])
+                    banner_image_url = chosen_res.get('url')
+                else:
+                    banner_image_url = thumbnail_data.get('originalUrl')
 
                 publish_time_str = "N/A"
-                pub_date_raw = content_data.get('pubDate')
+                pub_date_raw = content_get('pubDate')
                 
                 if pub_date_raw:
                     try:
@@ -619,13 +948,16 @@ class FinancialDataService:
                 "feed": feed_items
             }
         except Exception as e:
-            print(f"Error fetching yfinance news for ticker {symbol}: {e}")
-            traceback.print_exc()
+            logger.exception("Error fetching yfinance news for ticker %s: %s", symbol, e)
             return {"Error Message": f"Failed to retrieve news for {symbol}: {str(e)}"}
 
+    @async_ttl_cache(ttl=60, should_cache=_is_cacheable)
     async def get_crypto_exchange_rate(self, from_currency_symbol: str, to_currency_symbol: str = None):
         """Fetches the current exchange rate for a cryptocurrency pair.
 
+        Recent minute bars are only requested when the quote info carries no
+        live price.
+
         Args:
             from_currency_symbol (str): The base cryptocurrency symbol (e.g., "BTC").
             to_currency_symbol (str): The quote currency symbol (e.g., "USD").
@@ -638,8 +970,7 @@ class FinancialDataService:
         yf_symbol = f"{from_currency_symbol.upper()}-{effective_to_currency.upper()}"
 
         try:
-            ticker = yf.Ticker(yf_symbol)
-            info = await self._run_sync(lambda: ticker.info)
+            info = await self._get_info_cached(yf_symbol)
             if info and info.get('regularMarketPrice'):
                  last_refreshed_ts = info.get('regularMarketTime')
                  last_refreshed_str = datetime.fromtimestamp(last_refreshed_ts).strftime('%Y-%m-%d %H:%M:%S %Z') if last_refreshed_ts else "N/A"
@@ -657,6 +988,7 @@ class FinancialDataService:
                     }
                  }
             
+            ticker = self._ticker(yf_symbol)
             df_hist = await self._run_sync(ticker.history, period="2d", interval="1m")
             if df_hist.empty:
                 df_hist = await self._run_sync(ticker.history, period="2d", interval="5m")
@@ -675,31 +1007,37 @@ class FinancialDataService:
                 "Note": "Data from recent history, not live quote."
             }
         except Exception as e:
-            print(f"Error fetching crypto exchange rate for {yf_symbol} from yfinance: {e}")
+            logger.error("Error fetching crypto exchange rate for %s from yfinance: %s", yf_symbol, e)
             return {"Error Message": f"Failed to retrieve exchange rate for {yf_symbol}: {str(e)}"}
 
-    async def get_daily_crypto_data(self, symbol: str, market: str):
+    async def get_daily_crypto_data(self, symbol: str, market: str, outputsize: str = 'full'):
         """Fetches daily time series data for a cryptocurrency.
 
         Args:
             symbol (str): The cryptocurrency symbol (e.g., "BTC").
             market (str): The market/quote currency (e.g., "USD").
+            outputsize (str): 'compact' for the last 100 data points,
+                              'full' for the entire history.
 
         Returns:
             Dict: A dictionary containing metadata and daily crypto data.
         """
         yf_symbol = f"{symbol.upper()}-{market.upper()}"
         try:
-            ticker = yf.Ticker(yf_symbol)
-            df = await self._run_sync(ticker.history, period="max", interval="1d", auto_adjust=False)
+            period = "max" if outputsize == 'full' else "6mo"
+            df = await self._cached_history(yf_symbol, period=period, interval="1d", auto_adjust=False)
             if df.empty:
                 return {"Error Message": f"No daily crypto data found for {yf_symbol}."}
 
-            df = df.sort_index(ascending=False)
+            df = self._project_ohlcv(df)
+            if not df.index.is_monotonic_increasing:
+                df = df.sort_index()
+            if outputsize == 'compact':
+                df = df.tail(100)
 
             crypto_name = yf_symbol
             try:
-                info = await self._run_sync(lambda: ticker.info)
+                info = await self._get_info_cached(yf_symbol)
                 if info and info.get('shortName'): crypto_name = info.get('shortName')
                 elif info and info.get('longName'): crypto_name = info.get('longName')
             except: pass
@@ -713,13 +1051,13 @@ class FinancialDataService:
                     "3. Digital Currency Name": crypto_name,
                     "4. Market Code": market.upper(),
                     "5. Market Name": market.upper(),
-                    "6. Last Refreshed": datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC"),
+                    "6. Last Refreshed": _last_refreshed_stamp(),
                     "7. Time Zone": "UTC"
                 },
-                time_series_key: self._format_history_data(df.sort_index(ascending=True), interval_is_daily=True, is_crypto=True, symbol_meta=yf_symbol)
+                time_series_key: self._format_history_data(df, interval_is_daily=True, is_crypto=True, symbol_meta=yf_symbol)
             }
         except Exception as e:
-            print(f"Error fetching daily crypto data for {yf_symbol} from yfinance: {e}")
+            logger.error("Error fetching daily crypto data for %s from yfinance: %s", yf_symbol, e)
             return {"Error Message": f"Failed to retrieve daily crypto data for {yf_symbol}: {str(e)}"}
             
     async def get_crypto_rating(self, symbol: str):
@@ -731,9 +1069,10 @@ class FinancialDataService:
         Returns:
             Dict: A note indicating the feature is not available.
         """
-        print(f"Function 'get_crypto_rating' for {symbol} is not supported by yfinance.")
-        return {"Note": f"Crypto ratings (FCAS) are not available through yfinance for {symbol}."}
+        logger.info("Function 'get_crypto_rating' for %s is not supported by yfinance.", symbol)
+        return {"Note": _crypto_rating_note_text(symbol)}
 
+    @async_ttl_cache(ttl=60, should_cache=_is_cacheable)
     async def get_daily_fx_rates(self, from_symbol: str, to_symbol: str, outputsize: str = 'compact'):
         """Fetches daily time series for a foreign exchange pair.
 
@@ -746,17 +1085,18 @@ class FinancialDataService:
             Dict: A dictionary with metadata and daily FX time series.
         """
         yf_symbol = f"{from_symbol.upper()}{to_symbol.upper()}=X"
-        period = "max"
+        period = "max" if outputsize == 'full' else "6mo"
         
         try:
-            ticker = yf.Ticker(yf_symbol)
-            df = await self._run_sync(ticker.history, period=period, interval="1d", auto_adjust=False)
+            df = await self._cached_history(yf_symbol, period=period, interval="1d", auto_adjust=False)
             if df.empty:
                 return {"Error Message": f"No daily FX rates found for {yf_symbol}."}
 
-            df = df.sort_index(ascending=False)
+            df = self._project_ohlcv(df)
+            if not df.index.is_monotonic_increasing:
+                df = df.sort_index()
             if outputsize == 'compact':
-                df = df.head(100)
+                df = df.tail(100)
 
             time_series_key = f"Time Series FX (Daily)"
             return {
@@ -765,13 +1105,13 @@ class FinancialDataService:
                     "2. From Symbol": from_symbol.upper(),
                     "3. To Symbol": to_symbol.upper(),
                     "4. Output Size": outputsize,
-                    "5. Last Refreshed": datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC"),
+                    "5. Last Refreshed": _last_refreshed_stamp(),
                     "6. Time Zone": "UTC"
                 },
-                time_series_key: self._format_history_data(df.sort_index(ascending=True), interval_is_daily=True, is_fx=True)
+                time_series_key: self._format_history_data(df, interval_is_daily=True, is_fx=True)
             }
         except Exception as e:
-            print(f"Error fetching daily FX rates for {yf_symbol} from yfinance: {e}")
+            logger.error("Error fetching daily FX rates for %s from yfinance: %s", yf_symbol, e)
             return {"Error Message": f"Failed to retrieve daily FX rates for {yf_symbol}: {str(e)}"}
 
     async def get_sma(self, symbol: str, interval: str = 'daily', time_period: int = 20, series_type: str = 'close'):
@@ -780,7 +1120,7 @@ class FinancialDataService:
         Returns:
             Dict: A note indicating the feature needs to be implemented.
         """
-        return {"Note": "SMA calculation needs to be implemented separately using historical data from yfinance."}
+        return dict(_SMA_NOTE)
 
     async def get_ema(self, symbol: str, interval: str = 'daily', time_period: int = 20, series_type: str = 'close'):
         """Placeholder for EMA calculation. Not implemented.
@@ -788,7 +1128,7 @@ class FinancialDataService:
         Returns:
             Dict: A note indicating the feature needs to be implemented.
         """
-        return {"Note": "EMA calculation needs to be implemented separately using historical data from yfinance."}
+        return dict(_EMA_NOTE)
 
     async def get_real_gdp(self, interval: str = 'quarterly'):
         """Placeholder for Real GDP data. Not provided by yfinance.
@@ -796,7 +1136,7 @@ class FinancialDataService:
         Returns:
             Dict: A note indicating an alternative data source should be used.
         """
-        return {"Note": "Real GDP data is not directly available via yfinance. Check sources like FRED."}
+        return dict(_REAL_GDP_NOTE)
 
     async def get_cpi(self, interval: str = 'monthly'):
         """Placeholder for CPI data. Not provided by yfinance.
@@ -804,7 +1144,7 @@ class FinancialDataService:
         Returns:
             Dict: A note indicating an alternative data source should be used.
         """
-        return {"Note": "CPI data is not directly available via yfinance. Check sources like FRED."}
+        return dict(_CPI_NOTE)
 
     async def get_inflation(self):
         """Placeholder for inflation data. Not provided by yfinance.
@@ -812,8 +1152,9 @@ class FinancialDataService:
         Returns:
             Dict: A note indicating an alternative data source should be used.
         """
-        return {"Note": "Inflation data is not directly available via yfinance. Check sources like FRED."}
+        return dict(_INFLATION_NOTE)
 
+    @async_ttl_cache(ttl=60, should_cache=_is_cacheable)
     async def get_treasury_yield(self, interval: str = 'daily', maturity: str = '10year'):
         """Fetches historical data for a specific US Treasury yield.
 
@@ -825,33 +1166,22 @@ class FinancialDataService:
         Returns:
             Dict: A dictionary containing a list of treasury yield data points.
         """
-        maturity_map_yf = {
-            '3month': '^IRX',
-            '2year': '^UST2Y',
-            '5year': '^FVX',
-            '7year': None,
-            '10year': '^TNX',
-            '30year': '^TYX'
-        }
-        yf_treasury_symbol = maturity_map_yf.get(maturity)
+        yf_treasury_symbol = _TREASURY_SYMBOL_MAP.get(maturity)
 
         if not yf_treasury_symbol:
             return {"Error Message": f"Treasury yield for maturity '{maturity}' does not have a direct common yfinance symbol or is not supported."}
         
-        yf_hist_interval_map = {'daily': '1d', 'weekly': '1wk', 'monthly': '1mo'}
-        yf_hist_interval = yf_hist_interval_map.get(interval, '1d')
+        yf_hist_interval = _YF_INTERVAL_MAP.get(interval, '1d')
 
         try:
-            ticker = yf.Ticker(yf_treasury_symbol)
-            df = await self._run_sync(ticker.history, period="5y", interval=yf_hist_interval, auto_adjust=False)
+            df = await self._cached_history(yf_treasury_symbol, period="5y", interval=yf_hist_interval, auto_adjust=False)
             if df.empty:
                 return {"Error Message": f"No data found for Treasury Yield {maturity} ({yf_treasury_symbol})."}
 
             df = df.sort_index(ascending=False)
-            data_points = []
-            for index_date, row in df.iterrows():
-                date_key = index_date.strftime("%Y-%m-%d")
-                data_points.append({"date": date_key, "value": str(row.get('Close', 'N/A'))}) 
+            dates = df.index.strftime("%Y-%m-%d").tolist()
+            values = [str(value) for value in df['Close'].tolist()] if 'Close' in df.columns else ['N/A'] * len(dates)
+            data_points = [{"date": d, "value": v} for d, v in zip(dates, values)]
 
             return {
                 "name": f"Treasury Yield {maturity} ({yf_treasury_symbol})",
@@ -860,15 +1190,119 @@ class FinancialDataService:
                 "data": data_points
             }
         except Exception as e:
-            print(f"Error fetching Treasury Yield for {maturity} ({yf_treasury_symbol}) from yfinance: {e}")
+            logger.error("Error fetching Treasury Yield for %s (%s) from yfinance: %s", maturity, yf_treasury_symbol, e)
             return {"Error Message": f"Failed to retrieve Treasury Yield for {maturity}: {str(e)}"}
 
+    def _price_change_from_history(self, symbol: str, hist_df: pd.DataFrame) -> Dict[str, Any]:
+        """Computes the 24h price change from a recent OHLC history frame.
+
+        Args:
+            symbol (str): The asset symbol, used for labelling the result.
+            hist_df (pd.DataFrame): Recent history with at least two rows and
+                                    a 'Close' column.
+
+        Returns:
+            Dict[str, Any]: A dictionary with the price change details or an
+                            error message.
+        """
+        if not hist_df.index.is_monotonic_increasing:
+            hist_df = hist_df.sort_index()
+
+        # Bars without a close are skipped, as Series.asof did, so a NaN bar
+        # never becomes the latest or the reference price.
+        close_series = hist_df['Close']
+        valid = close_series.notna().to_numpy()
+        if not valid.any():
+            return {"Error Message": f"Could not determine valid current or 24h ago price for {symbol}."}
+        closes = close_series.to_numpy()[valid]
+        timestamps = _index_to_utc(hist_df.index)[valid]
+        latest_price = closes[-1]
+        latest_timestamp_utc = timestamps[-1]
+
+        target_timestamp_24h_ago_utc = latest_timestamp_utc - timedelta(hours=24)
+        
+        idx_loc = timestamps.searchsorted(target_timestamp_24h_ago_utc, side='right') - 1
+
+        if idx_loc < 0:
+            idx_loc = 0
+            note = _SPARSE_24H_NOTE
+        else:
+            note = None
+        price_24h_ago = closes[idx_loc]
+        timestamp_of_price_24h_ago_utc = timestamps[idx_loc]
+
+        if pd.isna(latest_price) or pd.isna(price_24h_ago):
+             return {"Error Message": f"Could not determine valid current or 24h ago price for {symbol}."}
+
+        return self._price_change_response(symbol, latest_price, latest_timestamp_utc, price_24h_ago, timestamp_of_price_24h_ago_utc, note)
+
+    def _price_change_response(self, symbol: str, latest_price: float, latest_timestamp_utc: pd.Timestamp, price_24h_ago: float, timestamp_of_price_24h_ago_utc: pd.Timestamp, note: Optional[str] = None) -> Dict[str, Any]:
+        """Builds the 24h price change payload from the two reference points.
+
+        Args:
+            symbol (str): The asset symbol.
+            latest_price (float): The most recent close.
+            latest_timestamp_utc (pd.Timestamp): When the latest close was recorded.
+            price_24h_ago (float): The close used as the 24h-ago reference.
+            timestamp_of_price_24h_ago_utc (pd.Timestamp): When the reference close was recorded.
+            note (Optional[str]): An optional remark about data quality.
+
+        Returns:
+            Dict[str, Any]: A dictionary with the price change details.
+        """
+        change_amount = latest_price - price_24h_ago
+        change_percent = (change_amount / price_24h_ago) * 100 if price_24h_ago != 0 else float('inf') if change_amount > 0 else 0
+
+        response = {
+            "symbol": symbol.upper(),
+            "current_price": float(latest_price),
+            "price_24h_ago": float(price_24h_ago),
+            "change_amount": float(change_amount),
+            "change_percent": float(change_percent),
+            "latest_price_timestamp_utc": latest_timestamp_utc.strftime('%Y-%m-%d %H:%M:%S %Z'),
+            "reference_price_24h_ago_timestamp_utc": timestamp_of_price_24h_ago_utc.strftime('%Y-%m-%d %H:%M:%S %Z'),
+            "latest_price_timestamp": latest_timestamp_utc.strftime('%Y-%m-%d %H:%M:%S %Z'),
+            "reference_price_24h_ago_timestamp": timestamp_of_price_24h_ago_utc.strftime('%Y-%m-%d %H:%M:%S %Z'),
+        }
+        if note:
+            response["note"] = note
+        return response
+
+    def _price_changes_from_closes(self, symbols: List[str], closes_df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        """Computes 24h price changes for every column of a wide close-price frame.
+
+        Args:
+            symbols (List[str]): The symbols, in the same order as the columns.
+            closes_df (pd.DataFrame): Close prices with one column per symbol
+                                      over a shared DatetimeIndex.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Price change details for each symbol
+                                       with at least two valid closes.
+        """
+        closes_df = closes_df.sort_index()
+        index = _index_to_utc(closes_df.index)
+
+        closes = closes_df.to_numpy(dtype=np.float64).T
+        latest, latest_idx, reference, reference_idx, sparse, valid_counts = _compute_24h_changes(closes, index.as_unit('ns').asi8)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for i, sym in enumerate(symbols):
+            if valid_counts[i] < 2:
+                continue
+            note = _SPARSE_24H_NOTE if sparse[i] else None
+            results[sym] = self._price_change_response(sym, latest[i], index[latest_idx[i]], reference[i], index[reference_idx[i]], note)
+        return results
+
+    @async_ttl_cache(ttl=60, should_cache=_is_cacheable)
     async def get_price_change_24h(self, symbol: str) -> Optional[Dict[str, Any]]:
         """Calculates the price change for a symbol over the last 24 hours.
 
         This method fetches recent historical data and finds the closest data
-        point to 24 hours ago to compute the change. It works for stocks,
-        crypto, and FX pairs.
+        point to 24 hours ago to compute the change. Hourly bars are tried
+        first, then 15-minute and finally daily bars; each coarser request is
+        only sent when the previous one returned too little data. It works for
+        stocks, crypto, and FX pairs.
 
         Args:
             symbol (str): The asset symbol (e.g., "AAPL", "BTC-USD", "EURUSD=X").
@@ -878,64 +1312,72 @@ class FinancialDataService:
                                       or an error message.
         """
         try:
-            ticker = yf.Ticker(symbol)
-            hist_df = await self._run_sync(ticker.history, period="2d", interval="1h", auto_adjust=False, prepost=True)
-
-            if hist_df.empty or len(hist_df) < 2:
-                hist_df = await self._run_sync(ticker.history, period="2d", interval="15m", auto_adjust=False, prepost=True)
-                if hist_df.empty or len(hist_df) < 2:
-                    hist_df = await self._run_sync(ticker.history, period="2d", interval="1d", auto_adjust=False)
-                    if hist_df.empty or len(hist_df) < 2:
-                        return {"Error Message": f"Not enough historical data for {symbol} in the last 2 days to calculate 24h change accurately."}
-            
-            hist_df = hist_df.sort_index()
-
-            if hist_df.index.tz is None:
-                hist_df.index = hist_df.index.tz_localize('UTC')
-            else:
-                hist_df.index = hist_df.index.tz_convert('UTC')
-
-            latest_data_point = hist_df.iloc[-1]
-            latest_price = latest_data_point['Close']
-            latest_timestamp_utc = latest_data_point.name
+            ticker = self._ticker(symbol)
+            for interval in _PRICE_CHANGE_INTERVALS:
+                history_kwargs = {"period": "2d", "interval": interval, "auto_adjust": False}
+                if interval != "1d":
+                    history_kwargs["prepost"] = True
+                try:
+                    hist_df = await self._run_sync(ticker.history, **history_kwargs)
+                except Exception as e:
+                    logger.warning("%s history for %s failed, trying coarser bars: %s", interval, symbol, e)
+                    continue
+                if not hist_df.empty and len(hist_df) >= 2:
+                    return self._price_change_from_history(symbol, hist_df)
+
+            return {"Error Message": f"Not enough historical data for {symbol} in the last 2 days to calculate 24h change accurately."}
 
-            target_timestamp_24h_ago_utc = latest_timestamp_utc - timedelta(hours=24)
-            
-            price_24h_ago_series = hist_df['Close'].asof(target_timestamp_24h_ago_utc)
+        except Exception as e:
+            logger.error("Error calculating 24h price change for %s using yfinance: %s", symbol, e)
+            return {"Error Message": f"An error occurred calculating 24h price change for {symbol}: {str(e)}"}
 
-            if pd.isna(price_24h_ago_series):
-                price_24h_ago = hist_df['Close'].iloc[0]
-                timestamp_of_price_24h_ago_utc = hist_df.index[0]
-                note = "Used earliest available price in the fetched window as 24h ago reference due to sparse data."
-            else:
-                price_24h_ago = price_24h_ago_series
-                idx_loc = hist_df.index.get_indexer([target_timestamp_24h_ago_utc], method='ffill')[0]
-                timestamp_of_price_24h_ago_utc = hist_df.index[idx_loc]
-                note = None
+    async def get_price_change_24h_batch(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Calculates the 24h price change for several symbols at once.
 
-            if pd.isna(latest_price) or pd.isna(price_24h_ago):
-                 return {"Error Message": f"Could not determine valid current or 24h ago price for {symbol}."}
+        All symbols are fetched with a single `yf.download` call instead of
+        one history request per symbol. Symbols the batch could not cover
+        (e.g. too few hourly bars) fall back to `get_price_change_24h`.
 
-            change_amount = latest_price - price_24h_ago
-            change_percent = (change_amount / price_24h_ago) * 100 if price_24h_ago != 0 else float('inf') if change_amount > 0 else 0
+        Args:
+            symbols (List[str]): The asset symbols (e.g., ["AAPL", "BTC-USD"]).
 
-            response = {
-                "symbol": symbol.upper(),
-                "current_price": float(latest_price),
-                "price_24h_ago": float(price_24h_ago),
-                "change_amount": float(change_amount),
-                "change_percent": float(change_percent),
-                "latest_price_timestamp_utc": latest_timestamp_utc.strftime('%Y-%m-%d %H:%M:%S %Z'),
-                "reference_price_24h_ago_timestamp_utc": timestamp_of_price_24h_ago_utc.strftime('%Y-%m-%d %H:%M:%S %Z'),
-                "latest_price_timestamp": latest_timestamp_utc.strftime('%Y-%m-%d %H:%M:%S %Z'),
-                "reference_price_24h_ago_timestamp": timestamp_of_price_24h_ago_utc.strftime('%Y-%m-%d %H:%M:%S %Z'),
-            }
-            if note:
-                response["note"] = note
-            return response
+        Returns:
+            Dict[str, Dict[str, Any]]: Price change details (or an error
+                                       message) keyed by the requested symbol.
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        if not unique_symbols:
+            return {}
 
+        results: Dict[str, Dict[str, Any]] = {}
+        try:
+            df = await self._run_sync(
+                yf.download, tickers=unique_symbols, period="2d", interval="1h",
+                threads=True, progress=False, auto_adjust=False, prepost=True, group_by='ticker'
+            )
         except Exception as e:
-            print(f"Error calculating 24h price change for {symbol} using yfinance: {e}")
-            return {"Error Message": f"An error occurred calculating 24h price change for {symbol}: {str(e)}"}
+            logger.error("Error batch-downloading 24h history for %s using yfinance: %s", unique_symbols, e)
+            df = pd.DataFrame()
+
+        present: List[str] = []
+        if not df.empty:
+            if isinstance(df.columns, pd.MultiIndex):
+                present = [sym for sym in unique_symbols if (sym, 'Close') in df.columns]
+                closes_df = df.loc[:, [(sym, 'Close') for sym in present]]
+            elif len(unique_symbols) == 1 and 'Close' in df.columns:
+                present = unique_symbols
+                closes_df = df[['Close']]
+
+        if present:
+            try:
+                results.update(self._price_changes_from_closes(present, closes_df))
+            except Exception as e:
+                logger.error("Error calculating batched 24h price changes for %s: %s", present, e)
+
+        missing = [sym for sym in unique_symbols if sym not in results]
+        if missing:
+            fallbacks = await asyncio.gather(*(self.get_price_change_24h(sym) for sym in missing))
+            results.update(zip(missing, fallbacks))
+        return results
 
 financial_data_service = FinancialDataService()
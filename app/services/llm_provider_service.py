@@ -1,50 +1,123 @@
-from ollama import Client
+import httpx
+import orjson
+from cachetools import TTLCache
+from ollama import AsyncClient
 from ollama import ChatResponse as OllamaChatResponseType
 from ollama import Message as OllamaMessageType
-from typing import List, Dict, Union, Optional, AsyncGenerator
+from typing import Any, List, Dict, Union, Optional, AsyncGenerator
 from app.core.config import settings
+from app.utils.async_cache import SingleFlight
 import asyncio
-import threading
+import hashlib
+import logging
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+_response_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+
+_DETERMINISTIC_OPTIONS = MappingProxyType({"temperature": 0})
+
+def _request_key(model: str, format_type: Optional[Union[str, Dict[str, Any]]], messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> str:
+    """Returns a stable hash identifying an LLM request."""
+    return hashlib.blake2b(
+        orjson.dumps([model, format_type, messages, dict(options) if options else None], option=orjson.OPT_SORT_KEYS, default=str)
+    ).hexdigest()
 
 class LLMProviderService:
-    def __init__(self):
+    def __init__(self, stream_batch_chars: int = 64, stream_batch_ms: int = 30):
         """Initializes the LLMProviderService.
         
-        Sets up the Ollama client and configures the primary and secondary
-        LLM models from application settings.
+        Sets up the async Ollama client (one pooled, keep-alive httpx client
+        shared by every call), configures the primary and secondary LLM
+        models from application settings, and caps how many chat requests
+        and streams may be open against the Ollama host at once.
+
+        Args:
+            stream_batch_chars (int): Streamed tokens are buffered until at
+                least this many characters are pending...
+            stream_batch_ms (int): ...or until this many milliseconds have
+                passed since the last flush.
         """
-        self.client = Client(host=settings.OLLAMA_HOST)
+        self.stream_batch_chars = stream_batch_chars
+        self.stream_batch_seconds = stream_batch_ms / 1000
+        self.client = AsyncClient(
+            host=settings.OLLAMA_HOST,
+            limits=httpx.Limits(max_keepalive_connections=settings.LLM_HTTP_POOL_SIZE)
+        )
+        self._stream_slots = asyncio.Semaphore(settings.LLM_MAX_CONCURRENT_STREAMS)
+        self._chat_slots = asyncio.Semaphore(settings.LLM_MAX_CONCURRENT_REQUESTS)
+        self._chat_flight = SingleFlight()
         self.model_name = settings.LLM_MODEL
         self.smaller_model_name = settings.SMALLER_LLM_MODEL
-        print(f"LLMProviderService initialized with primary model: {self.model_name}, smaller model: {self.smaller_model_name} on host: {settings.OLLAMA_HOST}")
+        self._base_chat_kwargs = {
+            False: MappingProxyType({"model": self.model_name, "keep_alive": settings.LLM_KEEP_ALIVE}),
+            True: MappingProxyType({"model": self.smaller_model_name, "keep_alive": settings.LLM_KEEP_ALIVE}),
+        }
+        self._base_chat_kwargs_json = {
+            use_smaller: MappingProxyType({**base, "format": "json"}) for use_smaller, base in self._base_chat_kwargs.items()
+        }
+        logger.info("LLMProviderService initialized with primary model: %s, smaller model: %s on host: %s", self.model_name, self.smaller_model_name, settings.OLLAMA_HOST)
+
+    async def aclose(self) -> None:
+        """Closes the Ollama client's pooled HTTP connections.
+
+        `ollama.AsyncClient` has no public close method and builds its httpx
+        client internally, so the internal client is looked up defensively.
+        If a library update renames it, the connections are left to the
+        garbage collector and a warning is logged instead of failing shutdown.
+        """
+        http_aclose = getattr(getattr(self.client, "_client", None), "aclose", None)
+        if http_aclose is None:
+            logger.warning("Ollama client exposes no HTTP client to close; leaving its connections to the garbage collector.")
+            return
+        await http_aclose()
 
-    async def chat(self, messages: List[Dict[str, str]], format_type: Optional[str] = None, use_smaller_model: bool = False) -> Union[OllamaChatResponseType, Dict]:
+    async def chat(self, messages: List[Dict[str, str]], format_type: Optional[Union[str, Dict[str, Any]]] = None, use_smaller_model: bool = False, options: Optional[Dict[str, Any]] = None) -> Union[OllamaChatResponseType, Dict]:
         """Makes a direct, low-level call to the Ollama chat client.
 
+        At most `LLM_MAX_CONCURRENT_REQUESTS` calls are in flight at once;
+        further callers wait their turn on the shared connection pool.
+        Concurrent calls with identical model, format, options and messages
+        share a single generation.
+
         Args:
             messages (List[Dict[str, str]]): A list of message dictionaries.
-            format_type (Optional[str]): The desired response format (e.g., "json").
+            format_type (Optional[Union[str, Dict[str, Any]]]): The desired
+                response format: "json", or a JSON schema the reply must match.
             use_smaller_model (bool): If True, uses the smaller, faster model.
+            options (Optional[Dict[str, Any]]): Ollama sampling options
+                (e.g., temperature) for this request.
 
         Returns:
             Union[OllamaChatResponseType, Dict]: The response object from the
                 Ollama client or an error dictionary.
         """
+        model_to_use = self.smaller_model_name if use_smaller_model else self.model_name
+        key = _request_key(model_to_use, format_type, messages, options)
+        return await self._chat_flight.do(
+            key, lambda: self._request_chat(messages, format_type, use_smaller_model, options)
+        )
+
+    async def _request_chat(self, messages: List[Dict[str, str]], format_type: Optional[Union[str, Dict[str, Any]]], use_smaller_model: bool, options: Optional[Dict[str, Any]] = None) -> Union[OllamaChatResponseType, Dict]:
+        """Sends one chat request to Ollama; see `chat` for the arguments."""
         try:
             model_to_use = self.smaller_model_name if use_smaller_model else self.model_name
-            
-            chat_kwargs = {
-                "model": model_to_use,
-                "messages": messages
-            }
-            if format_type:
-                chat_kwargs["format"] = format_type
-
-            print(f"--- LLM call with model: {model_to_use} (format: {format_type or 'text'}) ---")
-            response = self.client.chat(**chat_kwargs)
+            if format_type is None:
+                base_kwargs = self._base_chat_kwargs[use_smaller_model]
+            elif format_type == "json":
+                base_kwargs = self._base_chat_kwargs_json[use_smaller_model]
+            else:
+                base_kwargs = {**self._base_chat_kwargs[use_smaller_model], "format": format_type}
+            if options:
+                base_kwargs = {**base_kwargs, "options": dict(options)}
+
+            logger.debug("LLM call with model: %s (format: %s)", model_to_use, format_type or 'text')
+            async with self._chat_slots:
+                response = await self.client.chat(**base_kwargs, messages=messages)
             return response
         except Exception as e:
-            print(f"LLMService.chat: Error communicating with LLM ({model_to_use}): {e}")
+            logger.error("LLMService.chat: Error communicating with LLM (%s): %s", model_to_use, e)
             return {"error": str(e), "llm_message_content": "Sorry, an LLM communication error occurred."}
 
     async def generate_response(
@@ -52,48 +125,70 @@ class LLMProviderService:
         prompt: str,
         history: List[Dict[str, str]] = None,
         is_json: bool = False,
-        use_smaller_model: bool = False
+        use_smaller_model: bool = False,
+        deterministic: bool = False,
+        response_schema: Optional[Dict[str, Any]] = None
     ) -> str:
         """Generates a complete, non-streamed response from the LLM.
 
+        Successful JSON-mode, schema-constrained and deterministic responses
+        are cached for five minutes per model and message list, since they
+        feed structured or reproducible outputs.
+
         Args:
             prompt (str): The user's prompt or question. Can be None if history
                           provides the full context.
             history (List[Dict[str, str]]): The conversation history.
             is_json (bool): If True, requests a JSON formatted response.
             use_smaller_model (bool): If True, uses the smaller, faster model.
+            deterministic (bool): If True, samples at temperature 0 so identical
+                                  requests can be answered from the cache.
+            response_schema (Optional[Dict[str, Any]]): A JSON schema the
+                response must conform to (Ollama structured outputs). Takes
+                precedence over `is_json`.
 
         Returns:
             str: The content of the LLM's response.
         """
-        messages_for_llm = []
-        if history:
-            messages_for_llm.extend(history)
         if prompt:
-            messages_for_llm.append({"role": "user", "content": prompt})
+            user_message = {"role": "user", "content": prompt}
+            messages_for_llm = history + [user_message] if history else [user_message]
+        else:
+            messages_for_llm = history or []
 
-        format_to_use = "json" if is_json else None
-        response_obj = await self.chat(messages_for_llm, format_type=format_to_use, use_smaller_model=use_smaller_model)
+        format_to_use = response_schema or ("json" if is_json else None)
+        options = _DETERMINISTIC_OPTIONS if deterministic else None
+        cache_key = None
+        if format_to_use is not None or deterministic:
+            model_to_use = self.smaller_model_name if use_smaller_model else self.model_name
+            cache_key = _request_key(model_to_use, format_to_use, messages_for_llm, options)
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("LLM response cache hit for model: %s", model_to_use)
+                return cached
+
+        response_obj = await self.chat(messages_for_llm, format_type=format_to_use, use_smaller_model=use_smaller_model, options=options)
 
         if isinstance(response_obj, OllamaChatResponseType):
             if hasattr(response_obj, 'message') and isinstance(response_obj.message, OllamaMessageType):
                 if hasattr(response_obj.message, 'content') and isinstance(response_obj.message.content, str):
+                    if cache_key is not None:
+                        _response_cache[cache_key] = response_obj.message.content
                     return response_obj.message.content
                 else:
-                    print(f"LLMProviderService.generate_response: Ollama Message object present, but 'content' attribute missing or not a string.")
-                    print(f"Message object details: role='{response_obj.message.role}', content_type='{type(response_obj.message.content)}'")
+                    logger.error("LLMProviderService.generate_response: Ollama Message object present, but 'content' is not a string (role=%s, type=%s).", response_obj.message.role, type(response_obj.message.content))
                     return "LLM Message object structure error (content)."
             else:
-                print(f"LLMProviderService.generate_response: OllamaChatResponseType received, but 'message' attribute missing or not an Ollama Message object.")
-                print(f"Malformed OllamaChatResponseType (message attribute): {response_obj}")
+                logger.error("LLMProviderService.generate_response: OllamaChatResponseType received, but 'message' attribute missing or not an Ollama Message object.")
+                logger.debug("Malformed OllamaChatResponseType (message attribute): %s", response_obj)
                 return "LLM response was received but had an unexpected internal structure (message attribute)."
 
         elif isinstance(response_obj, dict) and "error" in response_obj:
-            print(f"LLMProviderService.generate_response: Error received from self.chat(): {response_obj.get('error')}")
+            logger.error("LLMProviderService.generate_response: Error received from self.chat(): %s", response_obj.get('error'))
             return response_obj.get("llm_message_content", "An unspecified error occurred during LLM communication.")
 
-        print(f"LLMProviderService.generate_response: Unexpected type received from self.chat(). Type: {type(response_obj)}")
-        print(f"Unexpected response_obj content: {response_obj}")
+        logger.error("LLMProviderService.generate_response: Unexpected type received from self.chat(). Type: %s", type(response_obj))
+        logger.debug("Unexpected response_obj content: %s", response_obj)
         return "Sorry, an unexpected issue occurred while processing the LLM response."
 
     async def generate_streamed_response(
@@ -104,8 +199,14 @@ class LLMProviderService:
     ) -> AsyncGenerator[str, None]:
         """Generates a streamed response, yielding content chunks as they arrive.
         
-        This uses a separate thread for the blocking Ollama client call and an
-        asyncio.Queue to safely pass data back to the async event loop.
+        Chunks are read directly from the async Ollama client's stream and
+        coalesced into larger pieces (see `stream_batch_chars` and
+        `stream_batch_ms`) before being yielded; buffered text is flushed
+        once `stream_batch_ms` passes even if no further chunk arrives.
+
+        The stream holds one of the `LLM_MAX_CONCURRENT_STREAMS` slots until
+        it finishes or the generator is closed, so consumers should close it
+        (e.g. with `contextlib.aclosing`) when they stop early.
 
         Args:
             messages (List[Dict[str, str]]): The list of messages for the chat.
@@ -117,45 +218,66 @@ class LLMProviderService:
         """
         model_for_request = self.smaller_model_name if use_smaller_model else self.model_name
         
-        chat_kwargs = {
-            "model": model_for_request,
-            "messages": messages,
-            "stream": True
-        }
-        if is_json:
-            chat_kwargs["format"] = "json"
+        base_kwargs = (self._base_chat_kwargs_json if is_json else self._base_chat_kwargs)[use_smaller_model]
+        chat_kwargs = {**base_kwargs, "messages": messages, "stream": True}
 
-        print(f"--- LLM stream with model: {model_for_request} (format: {chat_kwargs.get('format', 'text')}) ---")
+        logger.debug("LLM stream with model: %s (format: %s)", model_for_request, chat_kwargs.get('format', 'text'))
 
         loop = asyncio.get_running_loop()
-        queue: asyncio.Queue[Union[Dict, Exception, None]] = asyncio.Queue()
+        buffer: List[str] = []
+        buffered_chars = 0
+        last_flush = loop.time()
 
-        def _producer():
+        async with self._stream_slots:
+            stream = None
+            pending_chunk: Optional[asyncio.Future] = None
             try:
-                for chunk in self.client.chat(**chat_kwargs):
-                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+                stream = await self.client.chat(**chat_kwargs)
+                chunks = stream.__aiter__()
+                while True:
+                    if pending_chunk is None:
+                        pending_chunk = asyncio.ensure_future(chunks.__anext__())
+                    # While text is buffered, wait for the next chunk only until
+                    # the flush deadline, so a slow model cannot hold it back.
+                    timeout = max(0.0, last_flush + self.stream_batch_seconds - loop.time()) if buffer else None
+                    done, _ = await asyncio.wait((pending_chunk,), timeout=timeout)
+                    if not done:
+                        yield "".join(buffer)
+                        buffer.clear()
+                        buffered_chars = 0
+                        last_flush = loop.time()
+                        continue
+                    finished, pending_chunk = pending_chunk, None
+                    try:
+                        chunk = finished.result()
+                    except StopAsyncIteration:
+                        break
+                    content = chunk.get("message", {}).get("content")
+                    if not content or not isinstance(content, str):
+                        continue
+                    buffer.append(content)
+                    buffered_chars += len(content)
+                    now = loop.time()
+                    if buffered_chars >= self.stream_batch_chars or now - last_flush >= self.stream_batch_seconds:
+                        yield "".join(buffer)
+                        buffer.clear()
+                        buffered_chars = 0
+                        last_flush = now
             except Exception as e:
-                loop.call_soon_threadsafe(queue.put_nowait, e)
+                logger.error("Error during LLM stream: %s", e)
+                if buffer:
+                    yield "".join(buffer)
+                    buffer.clear()
+                yield f"STREAM_ERROR: An error occurred with the LLM stream: {e}"
             finally:
-                loop.call_soon_threadsafe(queue.put_nowait, None)
-
-        thread = threading.Thread(target=_producer, daemon=True)
-        thread.start()
-
-        while True:
-            item = await queue.get()
-            if item is None:
-                break
-            if isinstance(item, Exception):
-                print(f"Error during LLM stream from producer thread: {item}")
-                yield f"STREAM_ERROR: An error occurred with the LLM stream: {item}"
-                return
-
-            msg = item.get("message", {})
-            content = msg.get("content")
-            if isinstance(content, str):
-                yield content
-
-        thread.join(timeout=1.0)
+                if pending_chunk is not None:
+                    pending_chunk.cancel()
+                # Closing the stream drops the HTTP response, so Ollama stops
+                # generating as soon as the consumer goes away.
+                if stream is not None:
+                    await stream.aclose()
+
+        if buffer:
+            yield "".join(buffer)
 
 llm_service = LLMProviderService()
\ No newline at end of file
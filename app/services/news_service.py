@@ -1,20 +1,38 @@
-from newsapi import NewsApiClient
+import asyncio
+import httpx
+import orjson
 from datetime import datetime, timedelta
-from typing import List
+from typing import Dict, List
 from app.core.config import settings
+from app.utils.async_cache import async_ttl_cache
 
-_newsapi = NewsApiClient(api_key=settings.NEWS_API_KEY)
+_newsapi = httpx.AsyncClient(
+    base_url="https://newsapi.org/v2",
+    headers={"X-Api-Key": settings.NEWS_API_KEY},
+    timeout=10.0,
+    limits=httpx.Limits(max_keepalive_connections=10),
+)
+_newsapi_slots = asyncio.Semaphore(10)
 
+@async_ttl_cache(ttl=300, should_cache=bool)
 async def fetch_stock_news(symbol: str, days: int = 1) -> List[str]:
     """Fetches recent news headlines and descriptions for a given stock symbol.
 
+    Non-empty results are cached for five minutes per (symbol, days), and
+    concurrent identical calls share a single NewsAPI request.
+
     Args:
         symbol (str): The stock symbol (e.g., "AAPL").
         days (int): The number of past days to fetch news for.
 
     Returns:
         List[str]: A list of strings, where each string combines a news
-                   article's title and description.
+                   article's title and description as "<title>. <description>".
+                   Untitled articles are skipped, and a missing or null
+                   description contributes an empty string.
+
+    Raises:
+        httpx.HTTPError: If the NewsAPI request fails or returns an error status.
     """
     now = datetime.utcnow().replace(microsecond=0)
     frm = now - timedelta(days=days)
@@ -22,16 +40,50 @@ async def fetch_stock_news(symbol: str, days: int = 1) -> List[str]:
     from_param = frm.isoformat(timespec="seconds")
     to_param   = now.isoformat(timespec="seconds")
 
-    resp = _newsapi.get_everything(
-        q=f"{symbol} stock OR {symbol} market",
-        from_param=from_param,
-        to=to_param,
-        language="en",
-        sort_by="publishedAt",
-        page_size=20,
+    http_resp = await _newsapi.get(
+        "/everything",
+        params={
+            "q": f"{symbol} stock OR {symbol} market",
+            "from": from_param,
+            "to": to_param,
+            "language": "en",
+            "sortBy": "publishedAt",
+            "pageSize": 20,
+        },
     )
+    http_resp.raise_for_status()
+    resp = orjson.loads(http_resp.content)
+
+    articles = resp.get("articles") or []
+    texts: List[str] = []
+    append = texts.append
+    for a in articles:
+        title = a.get("title")
+        if not title:
+            continue
+        append(title + ". " + (a.get("description") or ""))
+    return texts
+
+async def fetch_stock_news_many(symbols: List[str], days: int = 1) -> Dict[str, List[str]]:
+    """Fetches news texts for several symbols concurrently.
+
+    At most ten of these fetches are in flight at once, shared across calls,
+    to stay within the API's rate limits.
+
+    Args:
+        symbols (List[str]): The stock symbols to fetch news for.
+        days (int): The number of past days to fetch news for.
+
+    Returns:
+        Dict[str, List[str]]: The news texts for each symbol, as returned by
+                              `fetch_stock_news`.
+    """
+    async def _fetch_one(symbol: str):
+        async with _newsapi_slots:
+            return symbol, await fetch_stock_news(symbol, days)
+
+    return dict(await asyncio.gather(*(_fetch_one(symbol) for symbol in dict.fromkeys(symbols))))
 
-    return [
-        f"{a['title']}. {a.get('description','')}"
-        for a in resp.get("articles", [])
-    ]
\ No newline at end of file
+async def close_news_client() -> None:
+    """Closes the shared NewsAPI HTTP client and its pooled connections."""
+    await _newsapi.aclose()
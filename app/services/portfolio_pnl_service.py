@@ -1,73 +1,140 @@
+import asyncio
+import logging
+from collections import deque
 from sqlalchemy.orm import Session
-from typing import Dict
-from app.crud.transaction import get_transactions
-from app.services.portfolio_service import compute_portfolio_value
+from cachetools import TTLCache
+from typing import Deque, Dict, Optional, Tuple
+from app.db.session import SessionLocal
+from app.crud.transaction import get_transaction_watermark, iter_transactions_chronological
+from app.services.portfolio_service import compute_holdings_value, get_position_quantities
 from app.models.transaction import TransactionType
 
-async def compute_pnl(db: Session, portfolio_id: int) -> Dict[str, float]:
-    """Calculates the P&L for a portfolio.
+logger = logging.getLogger(__name__)
 
-    This function computes both realized and unrealized profit and loss.
-    - Realized P&L is calculated using the First-In, First-Out (FIFO)
-      accounting method on the portfolio's transaction history.
-    - Unrealized P&L is the difference between the current market value
-      of holdings and their original cost basis.
+_REALIZED_PNL_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+# Bumped on every invalidation, so a replay that was running while a
+# transaction changed is not written back to the cache.
+_PNL_GENERATIONS: Dict[int, int] = {}
+
+def invalidate_pnl_cache(portfolio_id: int) -> None:
+    """Drops the cached FIFO replay for a portfolio after a transaction is added, edited or deleted."""
+    _REALIZED_PNL_CACHE.pop(portfolio_id, None)
+    _PNL_GENERATIONS[portfolio_id] = _PNL_GENERATIONS.get(portfolio_id, 0) + 1
+
+def _replay_fifo(db: Session, portfolio_id: int) -> Tuple[float, float]:
+    """Replays a portfolio's trades in FIFO order.
 
     Args:
         db (Session): The SQLAlchemy database session.
-        portfolio_id (int): The ID of the portfolio to analyze.
+        portfolio_id (int): The ID of the portfolio to replay.
 
     Returns:
-        Dict[str, float]: A dictionary containing the realized_pnl,
-                          unrealized_pnl, current_market_value, and
-                          the cost_basis_of_current_holdings.
+        Tuple[float, float]: The realized P&L and the cost basis of the lots
+                             still held.
     """
-    txs = get_transactions(db, portfolio_id=portfolio_id, limit=0)
-
     realized_pnl = 0.0
-    bought_lots: Dict[str, list] = {}
+    current_holdings_cost_basis = 0.0
+    bought_lots: Dict[str, Deque[dict]] = {}
+    warned_symbols = set()
 
-    txs.sort(key=lambda tx: tx.timestamp)
+    BUY, SELL = TransactionType.BUY, TransactionType.SELL
 
-    for tx in txs:
-        symbol = tx.symbol
-        quantity = float(tx.quantity)
-        price = float(tx.price)
+    for symbol, tx_type, quantity, price in iter_transactions_chronological(db, portfolio_id):
+        quantity = float(quantity)
+        price = float(price)
 
-        if tx.type == TransactionType.BUY:
-            bought_lots.setdefault(symbol, []).append({'quantity': quantity, 'price': price})
+        if tx_type is BUY:
+            bought_lots.setdefault(symbol, deque()).append({'quantity': quantity, 'price': price})
+            current_holdings_cost_basis += quantity * price
         
-        elif tx.type == TransactionType.SELL:
+        elif tx_type is SELL:
             sell_quantity_remaining = quantity
+            lots = bought_lots.get(symbol)
             
-            if symbol not in bought_lots or not bought_lots[symbol]:
-                print(f"Warning: Selling {symbol} but no prior buy lots found or all sold. P&L for this sell might be inaccurate without full history or short-sale logic.")
-                pass
-
-            temp_lots_for_symbol = []
-            for lot in bought_lots.get(symbol, []):
-                if sell_quantity_remaining == 0:
-                    temp_lots_for_symbol.append(lot)
-                    continue
+            if not lots:
+                if symbol not in warned_symbols:
+                    warned_symbols.add(symbol)
+                    logger.warning("Selling %s but no prior buy lots found or all sold. P&L for this sell might be inaccurate without full history or short-sale logic.", symbol)
+                continue
 
+            while lots and sell_quantity_remaining > 0:
+                lot = lots[0]
                 if lot['quantity'] <= sell_quantity_remaining:
                     realized_pnl += (price - lot['price']) * lot['quantity']
+                    current_holdings_cost_basis -= lot['quantity'] * lot['price']
                     sell_quantity_remaining -= lot['quantity']
+                    lots.popleft()
                 else:
                     realized_pnl += (price - lot['price']) * sell_quantity_remaining
+                    current_holdings_cost_basis -= sell_quantity_remaining * lot['price']
                     lot['quantity'] -= sell_quantity_remaining
                     sell_quantity_remaining = 0
-                    temp_lots_for_symbol.append(lot)
-            
-            if symbol in bought_lots:
-                bought_lots[symbol] = temp_lots_for_symbol
 
-    current_holdings_cost_basis = 0.0
-    for symbol_lots in bought_lots.values():
-        for lot in symbol_lots:
-            current_holdings_cost_basis += lot['quantity'] * lot['price']
+    return realized_pnl, current_holdings_cost_basis
+
+def _load_realized_pnl(portfolio_id: int, cached: Optional[Tuple]) -> Tuple[Tuple, float, float]:
+    """Checks the transaction watermark and replays the trades if `cached` is stale.
+
+    Runs in a worker thread on a session of its own, so the caller's session
+    is never shared across threads.
+
+    Args:
+        portfolio_id (int): The ID of the portfolio to replay.
+        cached (Optional[Tuple]): The cached (watermark, realized P&L, cost
+                                  basis) entry, if any.
+
+    Returns:
+        Tuple[Tuple, float, float]: The current watermark, the realized P&L
+                                    and the cost basis of the lots still held.
+    """
+    db = SessionLocal()
+    try:
+        watermark = get_transaction_watermark(db, portfolio_id)
+        if cached is not None and cached[0] == watermark:
+            return cached
+        realized_pnl, current_holdings_cost_basis = _replay_fifo(db, portfolio_id)
+        return watermark, realized_pnl, current_holdings_cost_basis
+    finally:
+        db.close()
+
+async def compute_pnl(db: Session, portfolio_id: int) -> Dict[str, float]:
+    """Calculates the P&L for a portfolio.
+
+    This function computes both realized and unrealized profit and loss.
+    - Realized P&L is calculated using the First-In, First-Out (FIFO)
+      accounting method on the portfolio's transaction history. The replay
+      is cached per portfolio and dropped by `invalidate_pnl_cache` whenever
+      one of its transactions is added, edited or deleted. The transaction
+      count and latest ID are also checked as a guard against writes made
+      outside those routes.
+    - Unrealized P&L is the difference between the current market value
+      of holdings and their original cost basis.
+
+    The replay runs in a worker thread while the holdings are priced, so the
+    quote download and the transaction reads overlap.
+
+    Args:
+        db (Session): The SQLAlchemy database session.
+        portfolio_id (int): The ID of the portfolio to analyze.
+
+    Returns:
+        Dict[str, float]: A dictionary containing the realized_pnl,
+                          unrealized_pnl, current_market_value, and
+                          the cost_basis_of_current_holdings.
+    """
+    market_value_task = asyncio.create_task(compute_holdings_value(get_position_quantities(db, portfolio_id)))
+    generation = _PNL_GENERATIONS.get(portfolio_id, 0)
+    try:
+        watermark, realized_pnl, current_holdings_cost_basis = await asyncio.to_thread(
+            _load_realized_pnl, portfolio_id, _REALIZED_PNL_CACHE.get(portfolio_id)
+        )
+    except BaseException:
+        market_value_task.cancel()
+        raise
+    if _PNL_GENERATIONS.get(portfolio_id, 0) == generation:
+        _REALIZED_PNL_CACHE[portfolio_id] = (watermark, realized_pnl, current_holdings_cost_basis)
 
-    current_market_value = await compute_portfolio_value(db, portfolio_id)
+    current_market_value = await market_value_task
     
     unrealized_pnl = current_market_value - current_holdings_cost_basis
 
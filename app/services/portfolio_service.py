@@ -1,39 +1,54 @@
+import logging
+from collections import defaultdict
 from sqlalchemy.orm import Session
 from app.crud import portfolio as crud_portfolio
 from app.services.financial_data_service import financial_data_service
-import asyncio
 from typing import List, Dict, Union
 
-async def compute_portfolio_value(db: Session, portfolio_id: int) -> float:
-    """Computes the total current market value of a portfolio.
+logger = logging.getLogger(__name__)
+
+def _aggregate_quantities(positions) -> Dict[str, float]:
+    """Sums position quantities per symbol, so each symbol is priced once."""
+    quantities: Dict[str, float] = defaultdict(float)
+    for pos in positions:
+        quantities[str(pos.symbol)] += float(pos.quantity)
+    return quantities
 
-    This function fetches the current price for each position in the portfolio
-    concurrently and sums their market values.
+def get_position_quantities(db: Session, portfolio_id: int) -> Dict[str, float]:
+    """Reads a portfolio's positions and sums their quantities per symbol.
 
     Args:
         db (Session): The SQLAlchemy database session.
         portfolio_id (int): The ID of the portfolio.
 
     Returns:
-        float: The total market value of the portfolio.
+        Dict[str, float]: The held quantity keyed by symbol.
     """
-    positions = crud_portfolio.get_positions(db, portfolio_id)
-    total_value = 0.0
+    return _aggregate_quantities(crud_portfolio.get_positions(db, portfolio_id))
 
-    if not positions:
+async def compute_holdings_value(quantities: Dict[str, float]) -> float:
+    """Prices a set of holdings with one batched quote request.
+
+    Does not touch the database, so it can run alongside other work that
+    uses the caller's session.
+
+    Args:
+        quantities (Dict[str, float]): The held quantity keyed by symbol.
+
+    Returns:
+        float: The total market value of the holdings.
+    """
+    if not quantities:
         return 0.0
 
-    tasks = []
-    for pos in positions:
-        tasks.append(financial_data_service.get_stock_quote(str(pos.symbol)))
-    
-    quotes_results: List[Union[Dict, None]] = await asyncio.gather(*tasks, return_exceptions=True)
+    total_value = 0.0
+    quotes = await financial_data_service.get_stock_quotes_batch(list(quantities))
 
-    for i, pos in enumerate(positions):
-        quote_data = quotes_results[i]
+    for symbol, quantity in quantities.items():
+        quote_data = quotes.get(symbol)
         
         if isinstance(quote_data, Exception):
-            print(f"Error fetching quote for {pos.symbol} in compute_portfolio_value: {quote_data}. Omitting from total value.")
+            logger.error("Error fetching quote for %s in compute_holdings_value: %s. Omitting from total value.", symbol, quote_data)
             continue
 
         if quote_data and isinstance(quote_data, dict) and "Error Message" not in quote_data:
@@ -41,19 +56,35 @@ async def compute_portfolio_value(db: Session, portfolio_id: int) -> float:
                 price_str = quote_data.get("05. price")
                 if price_str and price_str != 'N/A':
                     price = float(price_str)
-                    total_value += price * float(pos.quantity)
+                    total_value += price * quantity
                 else:
-                    print(f"Warning: Could not get current price for {pos.symbol} in compute_portfolio_value. Price: {price_str}. Omitting from total value.")
+                    logger.warning("Could not get current price for %s in compute_holdings_value. Price: %s. Omitting from total value.", symbol, price_str)
             except ValueError:
-                print(f"Warning: Could not convert price '{price_str}' to float for {pos.symbol}. Omitting from total value.")
+                logger.warning("Could not convert price '%s' to float for %s. Omitting from total value.", price_str, symbol)
             except Exception as e:
-                print(f"An unexpected error occurred processing position {pos.symbol}: {e}. Omitting from total value.")
+                logger.error("An unexpected error occurred processing position %s: %s. Omitting from total value.", symbol, e)
         else:
             error_msg = quote_data.get("Error Message", "Unknown error") if isinstance(quote_data, dict) else "Received non-dict quote_data"
-            print(f"Warning: Could not fetch or use quote for {pos.symbol} in compute_portfolio_value: {error_msg}. Omitting from total value.")
+            logger.warning("Could not fetch or use quote for %s in compute_holdings_value: %s. Omitting from total value.", symbol, error_msg)
             
     return total_value
 
+async def compute_portfolio_value(db: Session, portfolio_id: int) -> float:
+    """Computes the total current market value of a portfolio.
+
+    Position quantities are aggregated per symbol, then the current price
+    of every symbol is fetched with one batched quote request and the
+    market values are summed.
+
+    Args:
+        db (Session): The SQLAlchemy database session.
+        portfolio_id (int): The ID of the portfolio.
+
+    Returns:
+        float: The total market value of the portfolio.
+    """
+    return await compute_holdings_value(get_position_quantities(db, portfolio_id))
+
 async def get_portfolio_24h_change_percentage(db: Session, portfolio_id: int) -> float:
     """Calculates the overall 24-hour change percentage of the portfolio.
 
@@ -74,22 +105,21 @@ async def get_portfolio_24h_change_percentage(db: Session, portfolio_id: int) ->
     total_current_value = 0.0
     total_previous_day_value = 0.0
     
-    tasks = [financial_data_service.get_stock_quote(str(pos.symbol)) for pos in positions]
-    quotes_results: List[Union[Dict, None]] = await asyncio.gather(*tasks, return_exceptions=True)
+    quantities = _aggregate_quantities(positions)
+    quotes = await financial_data_service.get_stock_quotes_batch(list(quantities))
 
     valid_data_for_change_calculation_found = False
-    for i, pos in enumerate(positions):
-        quote = quotes_results[i]
+    for symbol, quantity in quantities.items():
+        quote = quotes.get(symbol)
 
         if isinstance(quote, Exception):
-            print(f"Error fetching quote for {pos.symbol} in 24h change calc: {quote}. Skipping.")
+            logger.error("Error fetching quote for %s in 24h change calc: %s. Skipping.", symbol, quote)
             continue
 
         if quote and isinstance(quote, dict) and "Error Message" not in quote:
             try:
                 current_price_str = quote.get("05. price")
                 previous_close_str = quote.get("08. previous close")
-                quantity = float(pos.quantity)
 
                 if current_price_str and current_price_str != 'N/A' and \
                    previous_close_str and previous_close_str != 'N/A':
@@ -101,21 +131,21 @@ async def get_portfolio_24h_change_percentage(db: Session, portfolio_id: int) ->
                     total_previous_day_value += previous_close_price * quantity
                     valid_data_for_change_calculation_found = True
                 else:
-                    print(f"Warning: Missing current or previous price for {pos.symbol} in 24h change. Current: '{current_price_str}', Previous: '{previous_close_str}'. Skipping.")
+                    logger.warning("Missing current or previous price for %s in 24h change. Current: '%s', Previous: '%s'. Skipping.", symbol, current_price_str, previous_close_str)
             
             except (ValueError, TypeError) as e:
-                print(f"Error converting price/quantity for {pos.symbol} in 24h change: {e}. Skipping.")
+                logger.error("Error converting price for %s in 24h change: %s. Skipping.", symbol, e)
         else:
             error_msg = quote.get("Error Message", "Unknown error") if isinstance(quote, dict) else "Received non-dict quote data"
-            print(f"Warning: Could not fetch/use quote for {pos.symbol} in 24h change: {error_msg}. Skipping.")
+            logger.warning("Could not fetch/use quote for %s in 24h change: %s. Skipping.", symbol, error_msg)
 
     if not valid_data_for_change_calculation_found:
-        print("No valid price data found for any positions to calculate 24h portfolio change.")
+        logger.info("No valid price data found for any positions to calculate 24h portfolio change.")
         return 0.0
 
     if total_previous_day_value == 0:
         if total_current_value > 0:
-            print("Warning: Total previous day portfolio value is zero, current value positive. Percentage change is effectively infinite or undefined.")
+            logger.warning("Total previous day portfolio value is zero, current value positive. Percentage change is effectively infinite or undefined.")
             return 100.0
         return 0.0 
 
@@ -1,9 +1,23 @@
+import asyncio
+import joblib
+import logging
+import numpy as np
+import os
 import pandas as pd
+from cachetools import TTLCache
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from statistics import NormalDist
 from prophet import Prophet
+from typing import Any, Dict, List, Optional, Tuple, Union
+from app.core.config import settings
+from app.core.logging_setup import configure_worker_logging
 from app.services.financial_data_service import financial_data_service
 from app.services.sentiment_service import compute_sentiment_score
 from app.models.user import RiskAppetite, InvestmentGoals
 
+logger = logging.getLogger(__name__)
+
 RISK_FACTOR = {
     "Low": 0.8,
     "Medium": 1.0,
@@ -18,10 +32,231 @@ GOALS_FACTOR = {
     "Speculation": 1.3,
 }
 
+_FORECAST_CACHE: TTLCache = TTLCache(maxsize=2048, ttl=86400)
+
+_fit_pool: Optional[ProcessPoolExecutor] = None
+
+def _init_fit_worker() -> None:
+    """Pool initializer: sets up logging and, if `PROPHET_WARM_FIT_POOL` is on, warms the worker.
+
+    The warm-up loads Prophet's Stan model with one tiny fit, so the first
+    real fit in the worker does not pay for it.
+    """
+    configure_worker_logging()
+    if not settings.PROPHET_WARM_FIT_POOL:
+        return
+    warmup = pd.DataFrame({
+        "ds": pd.date_range("2020-01-01", periods=30, freq="B"),
+        "y": np.arange(30, dtype=np.float64),
+    })
+    try:
+        _new_prophet().fit(warmup)
+    except Exception as e:
+        logger.warning("Prophet warm-up fit failed in fit worker %s: %s", os.getpid(), e)
+
+def _get_fit_pool() -> ProcessPoolExecutor:
+    """Returns the process pool Prophet fits run in, creating it on first use."""
+    global _fit_pool
+    if _fit_pool is None:
+        _fit_pool = ProcessPoolExecutor(max_workers=settings.PROPHET_FIT_WORKERS, initializer=_init_fit_worker)
+    return _fit_pool
+
+def start_fit_pool() -> None:
+    """Spawns every fit worker up front, so their warm-up runs before the first forecast.
+
+    Does nothing unless `PROPHET_WARM_FIT_POOL` is enabled; otherwise the
+    pool starts on the first forecast that needs a fit.
+    """
+    if not settings.PROPHET_WARM_FIT_POOL:
+        return
+    pool = _get_fit_pool()
+    for _ in range(settings.PROPHET_FIT_WORKERS):
+        pool.submit(os.getpid)
+
+def shutdown_fit_pool() -> None:
+    """Stops the Prophet fit worker processes, if any were started."""
+    global _fit_pool
+    if _fit_pool is not None:
+        _fit_pool.shutdown(cancel_futures=True)
+        _fit_pool = None
+
+def _new_prophet() -> Prophet:
+    """Builds an unfitted Prophet model from the configured settings."""
+    return Prophet(
+        daily_seasonality=settings.PROPHET_DAILY_SEASONALITY,
+        weekly_seasonality=settings.PROPHET_WEEKLY_SEASONALITY,
+        yearly_seasonality=settings.PROPHET_YEARLY_SEASONALITY,
+        uncertainty_samples=0,
+    )
+
+def _warm_start_params(model: Prophet) -> Dict[str, Any]:
+    """Extracts a fitted model's MAP estimates in the form `Prophet.fit(init=...)` accepts."""
+    return {
+        "k": float(model.params["k"][0][0]),
+        "m": float(model.params["m"][0][0]),
+        "sigma_obs": float(model.params["sigma_obs"][0][0]),
+        "delta": np.asarray(model.params["delta"][0]),
+        "beta": np.asarray(model.params["beta"][0]),
+    }
+
+def _fit_prophet(df: pd.DataFrame, symbol: str, init: Optional[Dict[str, Any]] = None) -> Tuple[Prophet, float]:
+    """Fits Prophet on a `ds`/`y`/`sentiment_regressor` frame; runs inside a fit worker process.
+
+    Seasonalities follow the `PROPHET_*_SEASONALITY` settings. With daily
+    bars and horizons of a few weeks, only the weekly cycle is enabled by
+    default. Posterior sampling is disabled, so Prophet returns no uncertainty
+    bands. The half-width of the model's `interval_width` band is instead
+    derived from the fitted observation noise `sigma_obs`, assuming normal
+    errors.
+
+    When `init` holds the previous fit's parameters, the optimizer starts
+    from them. A day's extra bar barely moves the optimum, so far fewer
+    iterations are needed. If the warm start fails (e.g. after a change of
+    seasonality settings altered the parameter shapes), the fit is retried
+    from Prophet's default starting point.
+
+    Args:
+        df (pd.DataFrame): The training data, sorted by `ds`, with the
+                           sentiment score in `sentiment_regressor`.
+        symbol (str): The stock symbol, for error messages.
+        init (Optional[Dict[str, Any]]): Warm-start parameters from
+            `_warm_start_params`.
+
+    Returns:
+        Tuple[Prophet, float]: The fitted model and its interval half-width.
+
+    Raises:
+        ValueError: If the model fails to fit.
+    """
+    if init is not None:
+        model = _new_prophet()
+        model.add_regressor("sentiment_regressor")
+        try:
+            model.fit(df, init=init)
+        except Exception:
+            init = None
+
+    if init is None:
+        model = _new_prophet()
+        model.add_regressor("sentiment_regressor")
+        try:
+            model.fit(df)
+        except Exception as e:
+            raise ValueError(f"Error fitting Prophet model for {symbol}: {str(e)}. Ensure sufficient historical data.")
+
+    # sigma_obs is the fitted observation noise on Prophet's scaled target.
+    sigma = float(np.mean(model.params["sigma_obs"])) * model.y_scale
+    z_score = NormalDist().inv_cdf(0.5 + model.interval_width / 2)
+    half_width = z_score * sigma
+
+    return model, half_width
+
+def _model_cache_path(symbol: str) -> str:
+    """Maps a symbol to its fitted model in the on-disk Prophet cache."""
+    return os.path.join(settings.PROPHET_MODEL_CACHE_DIR, f"{symbol}.pkl")
+
+def _write_model_cache(fitted: Tuple[Prophet, float, float], cache_path: str) -> None:
+    """Atomically dumps a fitted Prophet model, its interval half-width and sentiment score to `cache_path`."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    joblib.dump(fitted, tmp_path)
+    os.replace(tmp_path, cache_path)
+
 class PredictionService:
     def __init__(self):
-        """Initializes the prediction service."""
-        pass
+        """Initializes the prediction service and its fitted-model cache."""
+        self._model_cache: TTLCache = TTLCache(maxsize=512, ttl=86400)
+        self._warm_starts: TTLCache = TTLCache(maxsize=512, ttl=7 * 86400)
+
+    async def _load_fitted_model(self, symbol: str, today: date, sentiment: float) -> Optional[Tuple[Prophet, float]]:
+        """Returns today's fitted model for `symbol` from memory or disk, if any.
+
+        Args:
+            symbol (str): The upper-cased stock symbol.
+            today (date): The trading day the model must have been fitted on.
+            sentiment (float): The sentiment score the model must have been
+                               fitted with.
+
+        Returns:
+            Optional[Tuple[Prophet, float]]: The fitted model and its interval
+                half-width, or None on a cache miss.
+        """
+        cached = self._model_cache.get(symbol)
+        if cached is not None and cached[0] == today and cached[3] == sentiment:
+            return cached[1], cached[2]
+
+        cache_path = _model_cache_path(symbol)
+        try:
+            if date.fromtimestamp(os.path.getmtime(cache_path)) == today:
+                model, half_width, fitted_sentiment = await asyncio.to_thread(joblib.load, cache_path)
+                if fitted_sentiment == sentiment:
+                    self._model_cache[symbol] = (today, model, half_width, sentiment)
+                    return model, half_width
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning("Ignoring unreadable Prophet model cache entry for %s (%s): %s", symbol, cache_path, e)
+        return None
+
+    async def _fit_model(self, symbol: str, sentiment: float, daily_series_data: Optional[Dict[str, Any]] = None) -> Tuple[Prophet, float]:
+        """Fits a Prophet model on the recent daily close history of `symbol`.
+
+        Only the last `PROPHET_LOOKBACK_DAYS` calendar days are used (three
+        years by default). Fit time grows with the number of rows, and for
+        forecasts of a few weeks older history mostly shifts the long-run
+        trend rather than improving the near-term prediction. Raise the
+        setting to trade fit time for a longer memory.
+
+        The CPU-bound fit runs in a worker process (see `_fit_prophet`), so
+        the event loop keeps serving requests and concurrent fits for
+        different symbols use separate cores. Each fit is warm-started from
+        the symbol's previous parameters, which are kept for a week.
+
+        Args:
+            symbol (str): The stock symbol.
+            sentiment (float): The current sentiment score, used as the
+                               model's regressor.
+            daily_series_data (Optional[Dict[str, Any]]): The symbol's daily
+                series if the caller already fetched it; fetched here otherwise.
+
+        Returns:
+            Tuple[Prophet, float]: The fitted model and its interval half-width.
+
+        Raises:
+            ValueError: If historical data is insufficient or if the model fails to fit.
+        """
+        if daily_series_data is None:
+            daily_series_data = await financial_data_service.get_daily_series(symbol, outputsize="full")
+        if not daily_series_data or isinstance(daily_series_data, dict) and daily_series_data.get("Error Message"):
+            error_msg = daily_series_data.get("Error Message", f"No data for symbol: {symbol}") if isinstance(daily_series_data, dict) else f"No data for symbol: {symbol}"
+            raise ValueError(error_msg)
+
+        n_days = len(daily_series_data)
+        ds = np.fromiter(daily_series_data, dtype="datetime64[D]", count=n_days)
+        y = np.fromiter((float(bar["4. close"]) for bar in daily_series_data.values()), dtype=np.float64, count=n_days)
+        in_window = ds >= np.datetime64(date.today(), "D") - np.timedelta64(settings.PROPHET_LOOKBACK_DAYS, "D")
+        ds = ds[in_window].astype("datetime64[ns]")
+        y = y[in_window]
+        # get_daily_series returns dates oldest first, so the sort is normally skipped.
+        if np.any(ds[1:] < ds[:-1]):
+            order = np.argsort(ds, kind="stable")
+            ds = ds[order]
+            y = y[order]
+        df = pd.DataFrame({"ds": ds, "y": y})
+        df["sentiment_regressor"] = sentiment
+
+        if df.empty:
+             raise ValueError(f"Historical data for {symbol} is empty after processing.")
+        if len(df) < 2:
+            raise ValueError(f"Not enough historical data points for {symbol} to make a forecast (requires at least 2). Found: {len(df)}")
+
+        symbol_key = symbol.upper()
+        loop = asyncio.get_running_loop()
+        model, half_width = await loop.run_in_executor(
+            _get_fit_pool(), _fit_prophet, df, symbol, self._warm_starts.get(symbol_key)
+        )
+        self._warm_starts[symbol_key] = _warm_start_params(model)
+        return model, half_width
 
     async def forecast(
         self,
@@ -33,11 +268,16 @@ class PredictionService:
         """Generates a personalized stock price forecast using Prophet.
 
         This method performs a multi-step process:
-        1. Fetches historical stock data.
-        2. Computes a current sentiment score for the stock to use as a model regressor.
-        3. Fits a Prophet time-series model to the data.
-        4. Generates a forecast for the specified number of future periods.
-        5. Adjusts the forecast's confidence intervals (upper and lower bounds)
+        1. Computes a current sentiment score for the stock to use as a model regressor.
+        2. Fetches historical stock data and fits a Prophet time-series model
+           to it. The fitted model only depends on the symbol's daily closes
+           and the sentiment score, so it is cached per symbol for the rest
+           of the day, in memory and on disk under `PROPHET_MODEL_CACHE_DIR`,
+           and reused while the sentiment score is unchanged.
+        3. Generates a forecast for the specified number of future periods.
+           The raw forecast is cached per symbol, day, sentiment and horizon,
+           since it does not depend on the user's profile.
+        4. Adjusts the forecast's confidence intervals (upper and lower bounds)
            based on the user's risk appetite and investment goals.
 
         Args:
@@ -53,60 +293,92 @@ class PredictionService:
         Raises:
             ValueError: If historical data is insufficient or if the model fails to fit.
         """
-        daily_series_data = await financial_data_service.get_daily_series(symbol, outputsize="full")
-        if not daily_series_data or isinstance(daily_series_data, dict) and daily_series_data.get("Error Message"):
-            error_msg = daily_series_data.get("Error Message", f"No data for symbol: {symbol}") if isinstance(daily_series_data, dict) else f"No data for symbol: {symbol}"
-            raise ValueError(error_msg)
-
-        df = (
-            pd.DataFrame.from_dict(daily_series_data, orient="index")
-              .reset_index()
-              .rename(columns={"index": "ds", "4. close": "y"})
-              [["ds", "y"]]
-        )
-        df["ds"] = pd.to_datetime(df["ds"])
-        df["y"]  = df["y"].astype(float)
-        df = df.sort_values(by='ds')
-
-        if df.empty:
-             raise ValueError(f"Historical data for {symbol} is empty after processing.")
-        if len(df) < 2:
-            raise ValueError(f"Not enough historical data points for {symbol} to make a forecast (requires at least 2). Found: {len(df)}")
-
-        sentiment = await compute_sentiment_score(symbol)
-        df["sentiment_regressor"] = sentiment
+        symbol_key = symbol.upper()
+        today = date.today()
+        daily_series_data = None
+        cached_model = self._model_cache.get(symbol_key)
+        if cached_model is None or cached_model[0] != today:
+            # No model fitted today in this process, so a fit is likely: fetch
+            # the history alongside the sentiment score instead of after it.
+            sentiment, daily_series_data = await asyncio.gather(
+                compute_sentiment_score(symbol),
+                financial_data_service.get_daily_series(symbol, outputsize="full"),
+            )
+        else:
+            sentiment = await compute_sentiment_score(symbol)
+        forecast_key = (symbol_key, today, sentiment, periods)
+        raw_forecast = _FORECAST_CACHE.get(forecast_key)
+        if raw_forecast is None:
+            fitted = await self._load_fitted_model(symbol_key, today, sentiment)
+            if fitted is None:
+                fitted = await self._fit_model(symbol, sentiment, daily_series_data)
+                self._model_cache[symbol_key] = (today, *fitted, sentiment)
+                try:
+                    await asyncio.to_thread(_write_model_cache, (*fitted, sentiment), _model_cache_path(symbol_key))
+                except OSError as e:
+                    logger.warning("Could not write Prophet model cache entry for %s: %s", symbol_key, e)
+            model, half_width = fitted
 
-        model = Prophet(daily_seasonality=True)
-        model.add_regressor("sentiment_regressor")
-        
-        try:
-            model.fit(df)
-        except Exception as e:
-            raise ValueError(f"Error fitting Prophet model for {symbol}: {str(e)}. Ensure sufficient historical data.")
-
-        future = model.make_future_dataframe(periods=periods, freq="B")
-        future["sentiment_regressor"] = sentiment
-
-        forecast_results = model.predict(future)
+            future = model.make_future_dataframe(periods=periods, freq="B", include_history=False)
+            future["sentiment_regressor"] = sentiment
+            forecast_results = await asyncio.to_thread(model.predict, future)
+            raw_forecast = (forecast_results["ds"].to_numpy(), forecast_results["yhat"].to_numpy(), half_width)
+            _FORECAST_CACHE[forecast_key] = raw_forecast
+        ds, yhat, half_width = raw_forecast
 
         rf_multiplier = RISK_FACTOR.get(risk_appetite, 1.0)
         gf_multiplier = GOALS_FACTOR.get(investment_goals, 1.0)
         adjustment_multiplier = rf_multiplier * gf_multiplier
 
-        out_df = forecast_results[["ds", "yhat", "yhat_lower", "yhat_upper"]].copy()
+        # The model's band is symmetric, so rescaling it is a single scalar:
+        # yhat -/+ multiplier * half_width, clamped so it never crosses yhat.
+        adjusted_half_width = max(adjustment_multiplier * half_width, 0.0)
+        yhat_lower_adjusted = yhat - adjusted_half_width
+        yhat_upper_adjusted = yhat + adjusted_half_width
 
-        out_df["yhat_lower_adjusted"] = out_df["yhat"] - adjustment_multiplier * (out_df["yhat"] - out_df["yhat_lower"])
-        out_df["yhat_upper_adjusted"] = out_df["yhat"] + adjustment_multiplier * (out_df["yhat_upper"] - out_df["yhat"])
-        
-        out_df["yhat_lower_adjusted"] = out_df[["yhat_lower_adjusted", "yhat"]].min(axis=1)
-        out_df["yhat_upper_adjusted"] = out_df[["yhat_upper_adjusted", "yhat"]].max(axis=1)
-        out_df.loc[out_df["yhat_lower_adjusted"] > out_df["yhat_upper_adjusted"], ["yhat_lower_adjusted", "yhat_upper_adjusted"]] = \
-            out_df.loc[out_df["yhat_lower_adjusted"] > out_df["yhat_upper_adjusted"], ["yhat_upper_adjusted", "yhat_lower_adjusted"]].values
+        dates = np.datetime_as_string(ds, unit="D").tolist()
+        return [
+            {"ds": day, "yhat": point, "yhat_lower_adjusted": lower, "yhat_upper_adjusted": upper}
+            for day, point, lower, upper in zip(
+                dates, yhat.tolist(), yhat_lower_adjusted.tolist(), yhat_upper_adjusted.tolist()
+            )
+        ]
 
-        recent_forecast = out_df.tail(periods).copy()
-        recent_forecast["ds"] = recent_forecast["ds"].dt.strftime('%Y-%m-%d')
-        
-        final_columns = ["ds", "yhat", "yhat_lower_adjusted", "yhat_upper_adjusted"]
-        return recent_forecast[final_columns].to_dict(orient="records")
+    async def forecast_many(
+        self,
+        symbols: List[str],
+        periods: int = 10,
+        risk_appetite: str = "Medium",
+        investment_goals: str = "Long-term Growth",
+    ) -> Dict[str, Union[List[Dict], Dict[str, str]]]:
+        """Forecasts several symbols concurrently.
+
+        History fetches overlap across symbols and cold fits are spread over
+        the fit worker pool, instead of running one symbol after another.
+
+        Args:
+            symbols (List[str]): The stock symbols to forecast.
+            periods (int): The number of future business days to forecast.
+            risk_appetite (str): The user's risk appetite (e.g., "Low", "Medium").
+            investment_goals (str): The user's investment goals (e.g., "Long-term Growth").
+
+        Returns:
+            Dict[str, Union[List[Dict], Dict[str, str]]]: The forecast for each
+                symbol (see `forecast`), or an error message for symbols that
+                could not be forecast.
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        results = await asyncio.gather(
+            *(self.forecast(sym, periods, risk_appetite, investment_goals) for sym in unique_symbols),
+            return_exceptions=True,
+        )
+        forecasts: Dict[str, Union[List[Dict], Dict[str, str]]] = {}
+        for sym, result in zip(unique_symbols, results):
+            if isinstance(result, Exception):
+                logger.warning("Forecast for %s failed in forecast_many: %s", sym, result)
+                forecasts[sym] = {"Error Message": str(result)}
+            else:
+                forecasts[sym] = result
+        return forecasts
 
 prediction_service = PredictionService()
\ No newline at end of file
@@ -13,6 +13,12 @@ logger = logging.getLogger(__name__)
 
 PINECONE_UPSERT_BATCH_SIZE = 100
 
+KB_UNAVAILABLE = "Knowledge base is currently unavailable."
+KB_EMBEDDING_ERROR = "Error generating query embedding for knowledge base search."
+KB_NO_RESULTS = "No relevant documents found in the knowledge base for this query."
+# Every message `get_pinecone_context` returns instead of retrieved context.
+KB_NO_CONTEXT_MESSAGES = frozenset({KB_UNAVAILABLE, KB_EMBEDDING_ERROR, KB_NO_RESULTS})
+
 class VectorDBService:
     def __init__(self):
         """Initializes the VectorDBService.
@@ -282,12 +288,12 @@ class VectorDBService:
         """
         if not self.index or not embedding_service.model:
             logger.warning("Pinecone index or embedding model not ready for get_pinecone_context.")
-            return "Knowledge base is currently unavailable."
+            return KB_UNAVAILABLE
 
         query_embedding_array = embedding_service.generate_embeddings(query_text) 
         if query_embedding_array is None:
             logger.error("Could not generate query embedding for Pinecone context retrieval.")
-            return "Error generating query embedding for knowledge base search."
+            return KB_EMBEDDING_ERROR
         
         if len(query_embedding_array.shape) > 1 and query_embedding_array.shape[0] == 1:
             query_embedding_list = query_embedding_array[0].tolist()
@@ -299,7 +305,7 @@ class VectorDBService:
         context_parts = []
         if not matches:
             logger.info(f"No relevant documents found in knowledge base for query: '{query_text[:50]}...'")
-            return "No relevant documents found in the knowledge base for this query."
+            return KB_NO_RESULTS
 
         for i, match in enumerate(matches):
             metadata = match.get('metadata', {})
@@ -2,6 +2,10 @@ from tavily import TavilyClient
 from app.core.config import settings
 from typing import List, Dict, Optional 
 
+# Returned by `get_search_context` when a search has no results; compare
+# against it instead of scanning result text.
+NO_SEARCH_RESULTS = "No relevant information found from web search."
+
 class WebSearchService:
     def __init__(self):
         """Initializes the WebSearchService.
@@ -50,13 +54,13 @@ class WebSearchService:
 
         Returns:
             str: A formatted string containing the content of all search results,
-                 or a message if no results were found.
+                 or `NO_SEARCH_RESULTS` if no results were found.
         """
         results = await self.search(query, **kwargs)
         context = ""
         for i, result in enumerate(results):
             content_snippet = result.get('content', '')
             context += f"Source {i+1} (URL: {result.get('url', 'N/A')}):\n{content_snippet}\n\n"
-        return context.strip() if context else "No relevant information found from web search."
+        return context.strip() if context else NO_SEARCH_RESULTS
 
 web_search_service = WebSearchService()
\ No newline at end of file
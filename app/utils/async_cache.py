@@ -0,0 +1,109 @@
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from cachetools import TTLCache
+from cachetools.keys import hashkey
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key onto one in-flight call.
+
+    The first caller for a key (the leader) runs the work; callers arriving
+    while it is in flight (followers) await its outcome instead of repeating
+    it. If the leader is cancelled (e.g. its client disconnected), followers
+    that were not cancelled themselves retry, and one of them becomes the
+    new leader, so one aborted request never fails unrelated ones.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs `fn()` for `key`, or joins the call already in flight for it.
+
+        Args:
+            key (Hashable): Identifies calls that may share one result.
+            fn (Callable[[], Awaitable[Any]]): Starts the work; only called
+                when this caller becomes the leader.
+
+        Returns:
+            Any: The result of the (possibly shared) call. Exceptions raised
+                 by the leader's call are re-raised in every waiting caller.
+        """
+        while True:
+            fut = self._inflight.get(key)
+            if fut is None:
+                break
+            try:
+                return await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if fut.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            # Retrieved here so an exception nobody awaited is not reported.
+            fut.exception()
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+
+
+def async_ttl_cache(ttl: float, maxsize: int = 256, should_cache: Optional[Callable[[Any], bool]] = None):
+    """Memoizes the results of a coroutine function for `ttl` seconds.
+
+    Results are keyed on the call arguments. Concurrent calls with the same
+    key are coalesced through a `SingleFlight`: only the first caller runs
+    the coroutine and the others await its outcome, even when that outcome
+    is not cacheable.
+
+    Args:
+        ttl (float): How long, in seconds, a result stays cached.
+        maxsize (int): The maximum number of cached results.
+        should_cache (Optional[Callable[[Any], bool]]): Predicate deciding
+            whether a result may be stored (e.g. to skip error payloads).
+            Every result is cached when omitted.
+
+    Returns:
+        Callable: A decorator for async functions and methods.
+    """
+    def decorator(func):
+        cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        flight = SingleFlight()
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = hashkey(*args, **kwargs)
+            try:
+                return cache[key]
+            except KeyError:
+                pass
+
+            async def load():
+                result = await func(*args, **kwargs)
+                if should_cache is None or should_cache(result):
+                    cache[key] = result
+                return result
+
+            return await flight.do(key, load)
+
+        wrapper.cache = cache
+        wrapper.inflight = flight
+        return wrapper
+    return decorator